@@ -0,0 +1,130 @@
+from app import db
+from models import Contact, Newsletter
+from pagination import parse_bool, parse_datetime, prefix_range
+from sqlite_backend import retry_locked
+from stats import record_triage
+
+MAX_BULK_IDS = 10000
+CONTACT_FILTERS = {'is_read', 'is_archived', 'since', 'until', 'email_prefix'}
+
+# Bulk triage action -> (column, value it sets)
+TRIAGE_ACTIONS = {
+    'read': (Contact.is_read, True),
+    'unread': (Contact.is_read, False),
+    'archive': (Contact.is_archived, True),
+    'unarchive': (Contact.is_archived, False),
+}
+
+
+class SelectionError(ValueError):
+    """A bulk selection of contacts is missing or malformed"""
+
+
+def contact_listing_query(args):
+    """Contacts matching the admin listing filters in `args` (request.args or a dict)"""
+    query = Contact.query
+    is_read = parse_bool(args.get('is_read'), 'is_read')
+    if is_read is not None:
+        query = query.filter(Contact.is_read.is_(is_read))
+    is_archived = parse_bool(args.get('is_archived'), 'is_archived')
+    if is_archived is not None:
+        query = query.filter(Contact.is_archived.is_(is_archived))
+    since = parse_datetime(args.get('since'), 'since')
+    if since:
+        query = query.filter(Contact.created_at >= since)
+    until = parse_datetime(args.get('until'), 'until')
+    if until:
+        query = query.filter(Contact.created_at < until)
+    if args.get('email_prefix'):
+        query = query.filter(prefix_range(Contact.email, args['email_prefix']))
+    return query
+
+
+def newsletter_listing_query(args):
+    """Subscriptions matching the admin listing filters in `args`"""
+    query = Newsletter.query
+    is_active = parse_bool(args.get('is_active'), 'is_active')
+    if is_active is not None:
+        query = query.filter(Newsletter.is_active.is_(is_active))
+    since = parse_datetime(args.get('since'), 'since')
+    if since:
+        query = query.filter(Newsletter.subscribed_at >= since)
+    until = parse_datetime(args.get('until'), 'until')
+    if until:
+        query = query.filter(Newsletter.subscribed_at < until)
+    if args.get('email_prefix'):
+        query = query.filter(prefix_range(Newsletter.email, args['email_prefix']))
+    return query
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def contact_selection_query(selection):
+    """
+    Contacts picked by a bulk selection
+
+    `selection` has exactly one of: "ids", a list of contact ids; "id_range",
+    [first_id, last_id] inclusive; or "filter", a non-empty dict of the
+    listing filters (is_read, is_archived, since, until, email_prefix).
+    Raises SelectionError, or PaginationError for a bad filter value.
+    """
+    given = [key for key in ('ids', 'id_range', 'filter') if key in selection]
+    if len(given) != 1:
+        raise SelectionError('Give exactly one of ids, id_range or filter')
+
+    if 'ids' in selection:
+        ids = selection['ids']
+        if not isinstance(ids, list) or not ids or not all(_is_id(i) for i in ids):
+            raise SelectionError('ids must be a non-empty list of contact ids')
+        if len(ids) > MAX_BULK_IDS:
+            raise SelectionError(f"At most {MAX_BULK_IDS} ids per request; use id_range or filter for more")
+        return Contact.query.filter(Contact.id.in_(set(ids)))
+
+    if 'id_range' in selection:
+        bounds = selection['id_range']
+        if not isinstance(bounds, list) or len(bounds) != 2 or not all(_is_id(i) for i in bounds) \
+                or bounds[0] > bounds[1]:
+            raise SelectionError('id_range must be [first_id, last_id]')
+        return Contact.query.filter(Contact.id.between(*bounds))
+
+    filters = selection['filter']
+    if not isinstance(filters, dict):
+        raise SelectionError('filter must be an object of listing filters')
+    unknown = set(filters) - CONTACT_FILTERS
+    if unknown:
+        raise SelectionError(f"Unknown filter: {', '.join(sorted(unknown))}")
+    # The listing filters parse query-string values and skip blank ones,
+    # which here would widen the UPDATE to every contact
+    conditions = {}
+    for key, value in filters.items():
+        if not isinstance(value, (str, int)) or not str(value).strip():
+            raise SelectionError(f"filter {key} needs a value")
+        conditions[key] = str(value)
+    if not conditions:
+        raise SelectionError('filter needs at least one condition')
+    return contact_listing_query(conditions)
+
+
+@retry_locked(db.session)
+def triage_contacts(action, selection):
+    """
+    Apply a TRIAGE_ACTIONS action to the selected contacts in one UPDATE
+
+    Rows already in the target state are left out of the UPDATE, so the
+    returned count is the number of contacts that actually changed.
+    """
+    column, value = TRIAGE_ACTIONS[action]
+    query = contact_selection_query(selection).filter(column.is_not(value))
+    updated = query.update({column: value}, synchronize_session=False)
+    record_triage(action, updated)
+    db.session.commit()
+    return updated
+
+
+# name -> (filtered query builder, sort column, id column)
+LISTINGS = {
+    'contacts': (contact_listing_query, Contact.created_at, Contact.id),
+    'newsletters': (newsletter_listing_query, Newsletter.subscribed_at, Newsletter.id),
+}
@@ -6,7 +6,11 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, parent_dir)
 
 import logging
+import importlib
+import importlib.util
 from flask import Flask, render_template, request, jsonify, send_file
+from email_dispatch import send_or_defer, deferred_emails
+from circuit_breaker import email_breaker
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,16 +28,26 @@ app.config['WTF_CSRF_ENABLED'] = False
 def inject_csrf_token():
     return dict(csrf_token=lambda: '')
 
-# Import helper functions
-try:
-    from email_service_vercel import send_contact_email, send_auto_reply_email
-    from pdf_generator_vercel import PortfolioPDFGenerator
-    EMAIL_AVAILABLE = True
-    PDF_AVAILABLE = True
-except Exception as e:
-    logger.warning(f"Import error: {e}")
-    EMAIL_AVAILABLE = False
-    PDF_AVAILABLE = False
+# Email and PDF helpers pull in requests, ReportLab and PIL, so they are
+# imported on first use instead of on every cold start
+_lazy_modules = {}
+
+def _load(module_name):
+    """Import a helper module once, returning None if it is unavailable"""
+    if module_name not in _lazy_modules:
+        try:
+            _lazy_modules[module_name] = importlib.import_module(module_name)
+        except Exception as e:
+            logger.warning(f"Import error: {e}")
+            _lazy_modules[module_name] = None
+    return _lazy_modules[module_name]
+
+def _installed(*package_names):
+    """Check that packages can be imported without importing them"""
+    return all(importlib.util.find_spec(name) is not None for name in package_names)
+
+EMAIL_AVAILABLE = _installed('requests')
+PDF_AVAILABLE = _installed('reportlab', 'PIL')
 
 # ============ Routes ============
 @app.route('/')
@@ -80,7 +94,12 @@ def health():
         'status': 'healthy',
         'platform': 'vercel',
         'email_available': EMAIL_AVAILABLE,
-        'pdf_available': PDF_AVAILABLE
+        'pdf_available': PDF_AVAILABLE,
+        'email_breaker': email_breaker.stats(),
+        'email_deferred': deferred_emails.stats(),
+        # Only reported once an email has been sent from this instance
+        'email_transport': sys.modules['email_transport'].get_transport().stats()
+                           if 'email_transport' in sys.modules else None
     }), 200
 
 @app.route('/api/contact', methods=['POST'])
@@ -103,10 +122,16 @@ def contact():
                 'message': 'Name, email, and message are required'
             }), 400
         
-        if EMAIL_AVAILABLE:
+        email_service = _load('email_service_vercel') if EMAIL_AVAILABLE else None
+        if email_service:
             admin_email = os.environ.get('ADMIN_EMAIL', 'harshilgajjar602@gmail.com')
-            send_contact_email(contact_data, admin_email)
-            send_auto_reply_email(contact_data)
+            results = send_or_defer({
+                'notification': (email_service.send_contact_email, (contact_data, admin_email)),
+                'auto_reply': (email_service.send_auto_reply_email, (contact_data,))
+            })
+            for name, (sent, result) in results.items():
+                if not sent:
+                    logger.warning(f"Contact {name} email failed: {result}")
         
         logger.info(f"Contact: {contact_data['email']}")
         
@@ -151,20 +176,17 @@ def newsletter():
 @app.route('/api/generate-pdf')
 def generate_pdf():
     try:
-        if not PDF_AVAILABLE:
+        pdf_generator = _load('pdf_generator_vercel') if PDF_AVAILABLE else None
+        if not pdf_generator:
             return jsonify({
                 'status': 'error',
                 'message': 'PDF generation not available'
             }), 503
         
-        pdf_generator = PortfolioPDFGenerator()
-        pdf_buffer = pdf_generator.generate_simple_pdf()
-        
-        return send_file(
-            pdf_buffer,
-            as_attachment=True,
-            download_name='BizzPulse_Portfolio.pdf',
-            mimetype='application/pdf'
+        return _load('pdf_cache').send_cached_pdf(
+            pdf_generator.PortfolioPDFGenerator,
+            pdf_generator.DEFAULT_PORTFOLIO_DATA,
+            download_name='BizzPulse_Portfolio.pdf'
         )
     except Exception as e:
         logger.error(f"PDF error: {e}")
@@ -10,6 +10,9 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+# Pool and SQLite settings are read from the environment on import
+from db_pool import get_database_url, engine_options  # noqa: E402
+
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 
@@ -28,18 +31,12 @@ app.secret_key = os.environ.get("SESSION_SECRET", "fallback_super_secret_key_123
 if not os.environ.get("VERCEL"):
     app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
-# Database configuration
-database_url = os.environ.get("DATABASE_URL")
-if database_url:
-    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
-    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-        "pool_recycle": 300,
-        "pool_pre_ping": True,
-    }
-else:
-    # Fallback for local development only
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///database.db"
-    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {}
+# Database configuration; without DATABASE_URL the app runs on
+# instance/database.db, tuned for production use by sqlite_backend
+database_url = get_database_url()
+app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+# Pool sizes follow the gunicorn worker model; see db_pool
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(database_url)
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 # CSRF Protection
@@ -49,6 +46,7 @@ csrf = CSRFProtect(app)
 db.init_app(app)
 
 from routes import *  # noqa: F401, F403
+import commands  # noqa: F401
 
 def init_app():
     """Initialize the application and database"""
@@ -56,17 +54,13 @@ def init_app():
         with app.app_context():
             # Import models after app initialization
             from models import Contact, Newsletter
+            from migrations import upgrade
             
-            # Only create tables if DATABASE_URL is set and not SQLite
-            database_url = os.environ.get("DATABASE_URL", "")
-            if database_url and not database_url.startswith("sqlite"):
-                try:
-                    db.create_all()
-                    app.logger.info("Database tables created successfully")
-                except Exception as e:
-                    app.logger.warning(f"Database initialization failed: {str(e)}")
-            else:
-                app.logger.warning("DATABASE_URL not set or using SQLite. Database features may not work.")
+            try:
+                applied = upgrade()
+                app.logger.info(f"Database schema up to date (applied migrations: {applied or 'none'})")
+            except Exception as e:
+                app.logger.warning(f"Database initialization failed: {str(e)}")
     except Exception as e:
         app.logger.error(f"App initialization error: {str(e)}")
         # Don't fail the app startup, just log the error
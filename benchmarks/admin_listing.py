@@ -0,0 +1,103 @@
+"""
+Benchmark the paginated admin listings as the tables grow
+
+Seeds a throwaway SQLite database with contacts and newsletter subscribers
+in steps, and after each step times the first page, a page deep into the
+listing (following next_cursor) and a filtered page of /admin/contacts and
+/admin/newsletters through the Flask test client. With keyset pagination
+every column should stay flat as the row count grows.
+
+    python benchmarks/admin_listing.py --sizes 10000 100000 300000
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+workdir = tempfile.mkdtemp(prefix='admin_listing_bench_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'listing.db')}"
+
+import logging  # noqa: E402
+from app import app, db  # noqa: E402
+from models import Contact, Newsletter  # noqa: E402
+
+logging.getLogger().setLevel(logging.WARNING)
+
+START = datetime(2024, 1, 1)
+
+
+def seed(start, stop):
+    contacts, subscribers = [], []
+    for i in range(start, stop):
+        created = START + timedelta(seconds=i * 30)
+        contacts.append({
+            'name': f"Contact {i}", 'email': f"user{i}@example{i % 50}.com", 'message': 'Hello',
+            'subject': 'Enquiry', 'created_at': created, 'is_read': i % 3 == 0
+        })
+        subscribers.append({'email': f"user{i}@example{i % 50}.com", 'subscribed_at': created, 'is_active': i % 7 != 0})
+        if len(contacts) == 10000:
+            db.session.execute(db.insert(Contact), contacts)
+            db.session.execute(db.insert(Newsletter), subscribers)
+            contacts, subscribers = [], []
+    if contacts:
+        db.session.execute(db.insert(Contact), contacts)
+        db.session.execute(db.insert(Newsletter), subscribers)
+    db.session.commit()
+
+
+def timed(client, url, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        times.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return statistics.median(times) * 1000, response.get_json()
+
+
+def deep_cursor(client, url, pages):
+    cursor = None
+    for _ in range(pages):
+        data = client.get(url + (f"&cursor={cursor}" if cursor else '')).get_json()
+        cursor = data['next_cursor']
+    return cursor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 200000])
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--deep-pages', type=int, default=20)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    cases = {
+        'contacts': f"/admin/contacts?limit={args.limit}",
+        'contacts unread': f"/admin/contacts?limit={args.limit}&is_read=false",
+        'contacts prefix': f"/admin/contacts?limit={args.limit}&email_prefix=user12",
+        'newsletters': f"/admin/newsletters?limit={args.limit}",
+        'newsletters active': f"/admin/newsletters?limit={args.limit}&is_active=true&since=2024-02-01",
+    }
+
+    print(f"{'rows':>8}  {'listing':<20}{'first ms':>10}{'deep ms':>10}")
+    with app.app_context():
+        db.create_all()
+        seeded = 0
+        for size in sorted(args.sizes):
+            seed(seeded, size)
+            seeded = size
+            for name, url in cases.items():
+                first_ms, _ = timed(client, url)
+                cursor = deep_cursor(client, url, args.deep_pages)
+                deep_ms = timed(client, f"{url}&cursor={cursor}")[0] if cursor else float('nan')
+                print(f"{size:>8}  {name:<20}{first_ms:>10.2f}{deep_ms:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark the streaming contact export as the table grows
+
+Seeds a throwaway SQLite database with contacts in steps and after each
+step exports all of them in every available format, with and without
+gzip, recording throughput, output size and peak Python heap (plus the
+pyarrow pool for Parquet/Arrow). Peak memory should stay flat as the row
+count grows.
+
+    python benchmarks/bulk_export.py --sizes 10000 100000 1000000
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+workdir = tempfile.mkdtemp(prefix='bulk_export_bench_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'export.db')}"
+
+import logging  # noqa: E402
+from app import app, db  # noqa: E402
+from models import Contact  # noqa: E402
+from exports import export_stream, EXTENSIONS, pa  # noqa: E402
+
+logging.getLogger().setLevel(logging.WARNING)
+
+START = datetime(2024, 1, 1)
+
+
+def seed(start, stop):
+    rows = []
+    for i in range(start, stop):
+        rows.append({
+            'name': f"Contact {i}", 'email': f"user{i}@example{i % 50}.com", 'subject': 'Enquiry',
+            'message': f"Hello, I would like to hear more about your services ({i}).\nThanks",
+            'company': 'Example Ltd' if i % 2 else None, 'created_at': START + timedelta(seconds=i * 30),
+            'is_read': i % 3 == 0
+        })
+        if len(rows) == 10000:
+            db.session.execute(db.insert(Contact), rows)
+            rows = []
+    if rows:
+        db.session.execute(db.insert(Contact), rows)
+    db.session.commit()
+
+
+def run(fmt, compress):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = arrow_peak = 0
+    for chunk in export_stream('contacts', fmt, compress=compress):
+        size += len(chunk)
+        if pa is not None:
+            arrow_peak = max(arrow_peak, pa.total_allocated_bytes())
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    db.session.remove()
+    return elapsed, size, peak, arrow_peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 300000])
+    args = parser.parse_args()
+
+    formats = [fmt for fmt in EXTENSIONS if pa is not None or fmt in ('ndjson', 'csv')]
+    print(f"{'rows':>8}  {'format':<12}{'rows/s':>10}{'MB out':>9}{'heap MB':>9}{'arrow MB':>10}")
+    with app.app_context():
+        db.create_all()
+        seeded = 0
+        for size in sorted(args.sizes):
+            seed(seeded, size)
+            seeded = size
+            for fmt in formats:
+                for compress in (False, True):
+                    elapsed, out, peak, arrow_peak = run(fmt, compress)
+                    label = fmt + ('.gz' if compress else '')
+                    print(f"{size:>8}  {label:<12}{size / elapsed:>10.0f}{out / 1e6:>9.1f}"
+                          f"{peak / 1e6:>9.2f}{arrow_peak / 1e6:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""
+Micro-benchmark of email body rendering
+
+Compares the per-email cost of the f-string bodies email_service.py used to
+build inline (copied below as the baseline), rendering the templates with a
+fresh uncached environment every call, and email_templates.render_email,
+for both the admin notification and the auto-reply.
+
+    python benchmarks/email_rendering.py --iterations 20000
+"""
+import os
+import sys
+import timeit
+import argparse
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import email_templates  # noqa: E402
+from email_templates import render_email  # noqa: E402
+
+CONTACT = {
+    'name': 'Jane Doe',
+    'email': 'jane@example.com',
+    'phone': '+1 555 0100',
+    'company': 'Example Corp',
+    'subject': 'Website redesign',
+    'message': 'Hello,\nWe would like a quote for a new website.\nThanks!'
+}
+
+
+def legacy_contact_notification(contact_data):
+    # Format the email content
+    email_subject = f"🔔 New Contact Form Submission - {contact_data['name']}"
+    
+    # Create HTML email content
+    email_html = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+            <div style="background-color: #2c5282; color: white; padding: 20px; border-radius: 8px 8px 0 0; text-align: center;">
+                <h1 style="margin: 0; font-size: 24px;">BizzPulse Admin Notification</h1>
+                <p style="margin: 10px 0 0 0; font-size: 16px;">New Contact Form Submission</p>
+            </div>
+            
+            <div style="background-color: #f8f9fa; padding: 20px; border: 1px solid #e2e8f0;">
+                <h2 style="color: #2c5282; margin-top: 0;">
+                    Someone is interested in your services!
+                </h2>
+                <p style="color: #4a5568; font-size: 16px; margin-bottom: 20px;">
+                    A potential client has submitted a contact form on your BizzPulse website. Here are the details:
+                </p>
+            </div>
+            
+            <div style="background-color: #f7fafc; padding: 20px; border-radius: 8px; margin: 20px 0;">
+                <h3 style="margin-top: 0; color: #2d3748;">Contact Information</h3>
+                
+                <table style="width: 100%; border-collapse: collapse;">
+                    <tr>
+                        <td style="padding: 8px 0; font-weight: bold; width: 120px;">Name:</td>
+                        <td style="padding: 8px 0;">{contact_data['name']}</td>
+                    </tr>
+                    <tr>
+                        <td style="padding: 8px 0; font-weight: bold;">Email:</td>
+                        <td style="padding: 8px 0;">
+                            <a href="mailto:{contact_data['email']}" style="color: #3182ce; text-decoration: none;">
+                                {contact_data['email']}
+                            </a>
+                        </td>
+                    </tr>
+                    {f'''<tr>
+                        <td style="padding: 8px 0; font-weight: bold;">Phone:</td>
+                        <td style="padding: 8px 0;">{contact_data['phone']}</td>
+                    </tr>''' if contact_data.get('phone') else ''}
+                    {f'''<tr>
+                        <td style="padding: 8px 0; font-weight: bold;">Company:</td>
+                        <td style="padding: 8px 0;">{contact_data['company']}</td>
+                    </tr>''' if contact_data.get('company') else ''}
+                    {f'''<tr>
+                        <td style="padding: 8px 0; font-weight: bold;">Subject:</td>
+                        <td style="padding: 8px 0;">{contact_data['subject']}</td>
+                    </tr>''' if contact_data.get('subject') else ''}
+                    <tr>
+                        <td style="padding: 8px 0; font-weight: bold;">Submitted:</td>
+                        <td style="padding: 8px 0;">{datetime.now().strftime('%B %d, %Y at %I:%M %p')}</td>
+                    </tr>
+                </table>
+            </div>
+            
+            <div style="background-color: #ffffff; padding: 20px; border: 1px solid #e2e8f0; border-radius: 8px;">
+                <h3 style="margin-top: 0; color: #2d3748;">Message</h3>
+                <div style="background-color: #f7fafc; padding: 15px; border-radius: 4px; border-left: 4px solid #3182ce;">
+                    {contact_data['message'].replace(chr(10), '<br>')}
+                </div>
+            </div>
+            
+            <div style="background-color: #e6fffa; padding: 20px; border-radius: 8px; border-left: 4px solid #38b2ac; margin-top: 20px;">
+                <h3 style="margin-top: 0; color: #2d3748;">Action Required</h3>
+                <p style="margin: 0; color: #4a5568;">
+                    <strong>Next Steps:</strong><br>
+                    • Review the contact details and message above<br>
+                    • Reply directly to this email to respond to {contact_data['name']}<br>
+                    • Follow up within 24 hours for best customer experience<br>
+                    • Check your BizzPulse admin dashboard for more submissions
+                </p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+    
+    # Create plain text version
+    phone_line = f"- Phone: {contact_data['phone']}" if contact_data.get('phone') else ''
+    company_line = f"- Company: {contact_data['company']}" if contact_data.get('company') else ''
+    subject_line = f"- Subject: {contact_data['subject']}" if contact_data.get('subject') else ''
+    
+    email_text = f"""
+BIZZPULSE ADMIN NOTIFICATION
+New Contact Form Submission
+
+POTENTIAL CLIENT DETAILS:
+- Name: {contact_data['name']}
+- Email: {contact_data['email']}
+{phone_line}
+{company_line}
+{subject_line}
+- Submitted: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}
+
+CLIENT MESSAGE:
+{contact_data['message']}
+
+ACTION REQUIRED:
+- Review the contact details above
+- Reply directly to this email to respond to {contact_data['name']}
+- Follow up within 24 hours for best customer experience
+- Check your BizzPulse admin dashboard for more submissions
+
+This email was sent from your BizzPulse contact form system.
+    """
+    return email_html, email_text
+
+
+def legacy_auto_reply(contact_data):
+    # Create auto-reply email content
+    email_subject = "Thank you for contacting BizzPulse"
+    
+    email_html = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+            <div style="text-align: center; margin-bottom: 30px;">
+                <h1 style="color: #2c5282; margin-bottom: 10px;">BizzPulse</h1>
+                <p style="color: #4a5568; font-size: 18px; margin: 0;">Business Consulting Excellence</p>
+            </div>
+            
+            <h2 style="color: #2d3748; border-bottom: 2px solid #e2e8f0; padding-bottom: 10px;">
+                Thank You for Your Message
+            </h2>
+            
+            <p>Dear {contact_data['name']},</p>
+            
+            <p>Thank you for reaching out to BizzPulse. We have received your message and appreciate your interest in our services.</p>
+            
+            <div style="background-color: #f7fafc; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #3182ce;">
+                <h3 style="margin-top: 0; color: #2d3748;">What happens next?</h3>
+                <ul style="margin-bottom: 0;">
+                    <li>Our team will review your message within 24 hours</li>
+                    <li>We'll reach out to you via email or phone to discuss your needs</li>
+                    <li>If urgent, feel free to call us directly at +1 (555) 123-4567</li>
+                </ul>
+            </div>
+            
+            <div style="background-color: #ffffff; padding: 20px; border: 1px solid #e2e8f0; border-radius: 8px; margin: 20px 0;">
+                <h3 style="margin-top: 0; color: #2d3748;">Your Message Summary</h3>
+                <p><strong>Subject:</strong> {contact_data.get('subject', 'General Inquiry')}</p>
+                <p><strong>Submitted:</strong> {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</p>
+            </div>
+            
+            <p>In the meantime, feel free to explore our website to learn more about our services and how we can help your business grow.</p>
+            
+            <p>Best regards,<br>
+            <strong>The BizzPulse Team</strong></p>
+            
+            <hr style="border: none; border-top: 1px solid #e2e8f0; margin: 30px 0;">
+            
+            <div style="font-size: 14px; color: #4a5568; text-align: center;">
+                <p>BizzPulse - Elevating Business Performance Through Innovation</p>
+                <p>Email: info@bizzpulse.com | Phone: +1 (555) 123-4567</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+    
+    email_text = f"""
+Dear {contact_data['name']},
+
+Thank you for reaching out to BizzPulse. We have received your message and appreciate your interest in our services.
+
+What happens next?
+- Our team will review your message within 24 hours
+- We'll reach out to you via email or phone to discuss your needs
+- If urgent, feel free to call us directly at +1 (555) 123-4567
+
+Your Message Summary:
+Subject: {contact_data.get('subject', 'General Inquiry')}
+Submitted: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}
+
+In the meantime, feel free to explore our website to learn more about our services and how we can help your business grow.
+
+Best regards,
+The BizzPulse Team
+
+BizzPulse - Elevating Business Performance Through Innovation
+Email: info@bizzpulse.com | Phone: +1 (555) 123-4567
+    """
+    return email_html, email_text
+
+
+def uncached(name):
+    """Render with a new environment, so templates are parsed and compiled every call"""
+    def render(contact):
+        email_templates._env = None
+        email_templates._templates.clear()
+        return render_email(name, contact)
+    return render
+
+
+CASES = {
+    'contact_notification': (legacy_contact_notification, uncached('contact_notification'),
+                             lambda c: render_email('contact_notification', c)),
+    'auto_reply': (legacy_auto_reply, uncached('auto_reply'), lambda c: render_email('auto_reply', c)),
+}
+
+
+def per_call_us(func, iterations):
+    func(CONTACT)  # compile templates and warm caches
+    best = min(timeit.repeat(lambda: func(CONTACT), number=iterations, repeat=5))
+    return best / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'email':<24}{'f-string us':>14}{'uncached us':>14}{'cached us':>14}")
+    for name, (legacy, uncached_render, cached_render) in CASES.items():
+        before = per_call_us(legacy, args.iterations)
+        compiled = per_call_us(uncached_render, max(args.iterations // 100, 10))
+        after = per_call_us(cached_render, args.iterations)
+        print(f"{name:<24}{before:>14.2f}{compiled:>14.2f}{after:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Local stand-in for the Resend HTTP API
+
+Accepts POST /emails and POST /emails/batch, answers with generated ids and
+counts what it received. It speaks HTTP/1.1 keep-alive like the real API
+and counts the connections it accepts. It can add latency per request and
+per new connection (standing in for the TLS handshake), fail a fraction of
+requests and enforce a request rate limit with 429 responses, so broadcasts
+and the email services can be exercised without network access:
+
+    python benchmarks/fake_resend.py --port 8025 --rate-limit 2
+    RESEND_API_URL=http://127.0.0.1:8025 flask broadcast-newsletter ...
+
+It can also be started in-process with FakeResend(...).start().
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeResend:
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, failure_rate=0.0, rate_limit=None,
+                 connect_latency=0.0):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.failure_rate = failure_rate
+        self.rate_limit = rate_limit
+        self.connections = 0
+        self.requests = 0
+        self.emails = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.recipients = []
+        self._window = []
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name='fake-resend', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'connections': self.connections,
+                'requests': self.requests,
+                'emails': self.emails,
+                'failures': self.failures,
+                'rate_limited': self.rate_limited
+            }
+
+    def _admit(self):
+        """Sliding one-second window, like Resend's per-second limit"""
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self._window = [t for t in self._window if now - t < 1.0]
+        if len(self._window) >= self.rate_limit:
+            return False
+        self._window.append(now)
+        return True
+
+    def _handle(self, path, body):
+        emails = body if path == '/emails/batch' else [body]
+        with self._lock:
+            self.requests += 1
+            if not self._admit():
+                self.rate_limited += 1
+                return 429, {'name': 'rate_limit_exceeded', 'message': 'Too many requests', 'statusCode': 429}
+            if random.random() < self.failure_rate:
+                self.failures += 1
+                return 500, {'name': 'internal_server_error', 'message': 'Injected failure', 'statusCode': 500}
+            ids = []
+            for email in emails:
+                self._next_id += 1
+                ids.append({'id': f"fake-{self._next_id}"})
+                self.recipients.extend(email.get('to', []))
+            self.emails += len(emails)
+        if path == '/emails/batch':
+            return 200, {'data': ids}
+        return 200, ids[0]
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; without this,
+            # Nagle plus delayed ACKs add ~40 ms to every keep-alive request
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+                if fake.connect_latency:
+                    time.sleep(fake.connect_latency)
+
+            def do_POST(self):
+                if self.path not in ('/emails', '/emails/batch'):
+                    self._reply(404, {'name': 'not_found', 'message': self.path, 'statusCode': 404})
+                    return
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if fake.latency:
+                    time.sleep(fake.latency)
+                self._reply(*fake._handle(self.path, body))
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local stand-in for the Resend API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--connect-latency', type=float, default=0.0,
+                        help='Seconds added to every new connection')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of requests answered with 500')
+    parser.add_argument('--rate-limit', type=int, default=None, help='Requests per second before 429s')
+    args = parser.parse_args()
+
+    fake = FakeResend(args.host, args.port, args.latency, args.failure_rate, args.rate_limit,
+                      args.connect_latency)
+    print(f"Fake Resend listening on {fake.url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        print(json.dumps(fake.stats()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Import-time budget check for the serverless entry point
+
+Runs `python -X importtime -c "import api.index"` in fresh interpreters,
+parses the timings into a report and exits non-zero when the cold import
+exceeds the budget or pulls in a module that must stay lazy.
+
+    python benchmarks/import_budget.py --budget-ms 400
+    python benchmarks/import_budget.py --report import_report.json
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy dependencies that must only load when a request needs them
+LAZY_MODULES = ('reportlab', 'PIL', 'resend', 'requests')
+
+_LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parse_importtime(stderr):
+    """Parse -X importtime output into a list of module timings"""
+    modules = []
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({
+                'module': name,
+                'self_us': int(self_us),
+                'cumulative_us': int(cumulative_us),
+                'depth': (len(indent) - 1) // 2
+            })
+    return modules
+
+
+def measure(target):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {target}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def build_report(target, runs, top):
+    samples = [measure(target) for _ in range(runs)]
+    totals = [sum(m['self_us'] for m in modules) for modules in samples]
+
+    # Report the run closest to the median so the module breakdown matches it
+    median_total = statistics.median(totals)
+    modules = samples[min(range(runs), key=lambda i: abs(totals[i] - median_total))]
+    loaded = {m['module'] for m in modules}
+
+    return {
+        'target': target,
+        'runs': runs,
+        'total_ms': median_total / 1000,
+        'total_ms_all_runs': [t / 1000 for t in totals],
+        'module_count': len(modules),
+        'lazy_modules_loaded': sorted(
+            name for name in LAZY_MODULES
+            if name in loaded or any(m.startswith(name + '.') for m in loaded)
+        ),
+        'slowest': sorted(modules, key=lambda m: m['cumulative_us'], reverse=True)[:top]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail when the cold import of the entry point regresses')
+    parser.add_argument('--target', default='api.index')
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('IMPORT_BUDGET_MS', 400)))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--report', default=None, help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    report = build_report(args.target, args.runs, args.top)
+    report['budget_ms'] = args.budget_ms
+
+    print(f"import {report['target']}: {report['total_ms']:.1f} ms "
+          f"(budget {args.budget_ms:.0f} ms, {report['module_count']} modules)")
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for m in report['slowest']:
+        print(f"{m['cumulative_us'] / 1000:>14.1f}{m['self_us'] / 1000:>10.1f}  {'  ' * m['depth']}{m['module']}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    if report['total_ms'] > args.budget_ms:
+        failures.append(f"cold import took {report['total_ms']:.1f} ms, budget is {args.budget_ms:.0f} ms")
+    if report['lazy_modules_loaded']:
+        failures.append(f"modules that must load lazily were imported: {', '.join(report['lazy_modules_loaded'])}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
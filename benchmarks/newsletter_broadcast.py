@@ -0,0 +1,90 @@
+"""
+Benchmark a newsletter broadcast against the local Resend stub
+
+Seeds a throwaway SQLite database with subscribers, starts
+benchmarks/fake_resend.py in-process and runs broadcast.run_broadcast over
+all of them, reporting throughput, batch count and peak traced memory.
+With --crash-after the first run is interrupted and resumed to check that
+every subscriber gets exactly one email.
+
+    python benchmarks/newsletter_broadcast.py --subscribers 100000
+    python benchmarks/newsletter_broadcast.py --subscribers 5000 --crash-after 10
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_resend import FakeResend  # noqa: E402
+
+fake = FakeResend().start()
+workdir = tempfile.mkdtemp(prefix='broadcast_bench_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'broadcast.db')}"
+os.environ['RESEND_API_URL'] = fake.url
+os.environ.setdefault('RESEND_API_KEY', 're_benchmark')
+
+from app import app, db  # noqa: E402
+from models import Newsletter  # noqa: E402
+from broadcast import TokenBucket, create_broadcast, run_broadcast  # noqa: E402
+
+
+class SimulatedCrash(Exception):
+    pass
+
+
+def seed(count):
+    db.create_all()
+    rows = [{'email': f"subscriber{i}@example.com", 'is_active': i % 10 != 0} for i in range(count)]
+    for start in range(0, count, 10000):
+        db.session.execute(db.insert(Newsletter), rows[start:start + 10000])
+    db.session.commit()
+    return sum(1 for row in rows if row['is_active'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=20000)
+    parser.add_argument('--chunk-size', type=int, default=100)
+    parser.add_argument('--rate', type=float, default=0,
+                        help='Batch requests per second (0 disables the limiter)')
+    parser.add_argument('--crash-after', type=int, default=None,
+                        help='Abort the first run after this many batches, then resume')
+    args = parser.parse_args()
+
+    with app.app_context():
+        active = seed(args.subscribers)
+        broadcast_id = create_broadcast('Benchmark', '<p>Hello</p>', 'Hello').id
+        bucket = TokenBucket(args.rate, max(args.rate, 1)) if args.rate else TokenBucket(float('inf'), 1)
+
+        def crash(broadcast):
+            if args.crash_after and broadcast.batch_count == args.crash_after:
+                raise SimulatedCrash(f"simulated crash after {broadcast.batch_count} batches")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            broadcast = run_broadcast(broadcast_id, args.chunk_size, bucket, progress=crash)
+        except SimulatedCrash as e:
+            print(f"First run: {e}, resuming")
+            broadcast = run_broadcast(broadcast_id, args.chunk_size, bucket)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        duplicates = sum(1 for count in Counter(fake.recipients).values() if count > 1)
+        print(f"{broadcast.sent_count} of {active} active subscribers in {broadcast.batch_count} batches, "
+              f"{elapsed:.2f}s ({broadcast.sent_count / elapsed:.0f} emails/s), "
+              f"peak traced memory {peak / 1024:.0f} KB")
+        print(f"Stub received {fake.stats()} with {duplicates} duplicate recipients")
+        if broadcast.status != 'completed' or len(fake.recipients) != active or duplicates:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
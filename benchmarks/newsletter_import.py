@@ -0,0 +1,70 @@
+"""
+Benchmark the bulk newsletter import
+
+Writes a CSV of subscriber addresses (with some duplicates, invalid rows
+and mixed case) to a temporary file and imports it into a throwaway SQLite
+database with import_subscribers, twice: the first run inserts, the
+second finds everyone already active. Reports rows/s and the process's
+peak RSS, which should not grow with the file size.
+
+    python benchmarks/newsletter_import.py --rows 1000000
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import resource
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+workdir = tempfile.mkdtemp(prefix='newsletter_import_bench_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'import.db')}"
+
+import logging  # noqa: E402
+from app import app, db  # noqa: E402
+from subscriptions import import_subscribers, iter_csv_emails  # noqa: E402
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+def write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('Name,Email\n')
+        for i in range(rows):
+            if i % 97 == 0:
+                f.write(f"Bad {i},not-an-address\n")
+            elif i % 31 == 0:
+                f.write(f"Dup {i}, USER{i - 1}@Example.com \n")
+            else:
+                f.write(f"User {i},user{i}@example.com\n")
+
+
+def run(path, chunk_size):
+    start = time.perf_counter()
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        counts = import_subscribers(iter_csv_emails(f), chunk_size)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    return counts, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    path = os.path.join(workdir, 'subscribers.csv')
+    write_csv(path, args.rows)
+    with app.app_context():
+        db.create_all()
+        for label in ('first import', 'second import'):
+            counts, elapsed, peak = run(path, args.chunk_size)
+            print(f"{label}: {counts['rows'] / elapsed:.0f} rows/s, {elapsed:.1f}s, peak RSS {peak:.0f} MB")
+            print(f"  {counts}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark PortfolioPDFGenerator.generate_portfolio_pdf
+
+Runs a fixed set of scenarios against pdf_generator.py and
+pdf_generator_vercel.py without any network access and records, per
+scenario, wall time, CPU time, peak traced memory and output size. Results
+are written as JSON so runs from different commits can be compared:
+
+    python benchmarks/pdf_generation.py --output before.json
+    python benchmarks/pdf_generation.py --output after.json --compare before.json
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Image paths in the generators are relative to the project root
+os.chdir(ROOT)
+
+import pdf_generator
+import pdf_generator_vercel
+
+GENERATORS = {
+    'pdf_generator': pdf_generator,
+    'pdf_generator_vercel': pdf_generator_vercel
+}
+
+AVAILABLE_IMAGES = pdf_generator.MAIN_IMAGES + pdf_generator.GALLERY_IMAGES
+
+
+def _gallery(count):
+    return [AVAILABLE_IMAGES[i % len(AVAILABLE_IMAGES)] for i in range(count)]
+
+
+def _features(count):
+    return [f"Feature {i}: real-time reporting with role based access control" for i in range(count)]
+
+
+# name -> (generator kwargs, portfolio data overrides, needs image support)
+SCENARIOS = {
+    'default': ({}, {}, False),
+    'gallery_0': ({'gallery_images': []}, {}, True),
+    'gallery_8': ({'gallery_images': _gallery(8)}, {}, True),
+    'gallery_24': ({'gallery_images': _gallery(24)}, {}, True),
+    'features_200': ({}, {'features': _features(200)}, False),
+    'features_1000': ({}, {'features': _features(1000)}, False),
+    'missing_images': ({
+        'main_images': ['static/img/portfolio/missing-main.webp'],
+        'gallery_images': [f"static/img/portfolio/missing-{i}.webp" for i in range(8)]
+    }, {}, True),
+}
+
+
+def run_scenario(module, generator_kwargs, portfolio_data, iterations):
+    if module is not pdf_generator:
+        generator_kwargs = {}
+
+    def render():
+        generator = module.PortfolioPDFGenerator(**generator_kwargs)
+        with generator.generate_portfolio_pdf(portfolio_data) as output:
+            return output.seek(0, os.SEEK_END)
+
+    render()  # warm up imports, style registry and image derivatives
+
+    wall_times, cpu_times = [], []
+    size = 0
+    for _ in range(iterations):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        size = render()
+        wall_times.append(time.perf_counter() - wall_start)
+        cpu_times.append(time.process_time() - cpu_start)
+
+    # Memory is traced in a separate pass since tracing slows rendering down
+    tracemalloc.start()
+    render()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'wall_median_s': statistics.median(wall_times),
+        'wall_min_s': min(wall_times),
+        'cpu_median_s': statistics.median(cpu_times),
+        'peak_memory_bytes': peak,
+        'output_bytes': size
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    header = f"{'generator':<22}{'scenario':<16}{'wall ms':>10}{'cpu ms':>10}{'peak KB':>10}{'size KB':>10}"
+    if baseline:
+        header += f"{'wall vs base':>14}"
+    print(header)
+
+    for name, scenarios in results['generators'].items():
+        for scenario, r in scenarios.items():
+            line = (f"{name:<22}{scenario:<16}{r['wall_median_s'] * 1000:>10.1f}"
+                    f"{r['cpu_median_s'] * 1000:>10.1f}{r['peak_memory_bytes'] / 1024:>10.0f}"
+                    f"{r['output_bytes'] / 1024:>10.0f}")
+            previous = (baseline or {}).get('generators', {}).get(name, {}).get(scenario)
+            if previous:
+                change = (r['wall_median_s'] / previous['wall_median_s'] - 1) * 100
+                line += f"{change:>+13.1f}%"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Run only the given scenario (repeatable)')
+    parser.add_argument('--output', default=None,
+                        help='Where to write the JSON results (default: benchmarks/results/)')
+    parser.add_argument('--compare', default=None, help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    results = {
+        'created_at': datetime.now().isoformat(),
+        'git_revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'generators': {}
+    }
+
+    for name, module in GENERATORS.items():
+        results['generators'][name] = {}
+        for scenario in args.scenario or SCENARIOS:
+            generator_kwargs, overrides, needs_images = SCENARIOS[scenario]
+            if needs_images and module is not pdf_generator:
+                # The Vercel generator embeds no images
+                continue
+            portfolio_data = dict(module.DEFAULT_PORTFOLIO_DATA, **overrides)
+            results['generators'][name][scenario] = run_scenario(
+                module, generator_kwargs, portfolio_data, args.iterations
+            )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output or os.path.join(
+        ROOT, 'benchmarks', 'results', f"pdf_generation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare email transports against the local Resend stub
+
+Sends the same burst of emails through ResendSDKTransport (a new connection
+per call) and SessionTransport (pooled keep-alive connections), sequentially
+and from several threads, and reports latency and how many connections the
+stub accepted. --connect-latency delays every new connection on the stub to
+stand in for the TCP and TLS handshake with the real API.
+
+    python benchmarks/resend_transport.py --emails 200 --connect-latency 0.05
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_resend import FakeResend  # noqa: E402
+from email_transport import ResendSDKTransport, SessionTransport  # noqa: E402
+
+PARAMS = {
+    "from": "BizzPulse <onboarding@resend.dev>",
+    "to": ["admin@example.com"],
+    "subject": "Benchmark",
+    "html": "<p>Hello</p>",
+    "text": "Hello",
+}
+
+
+def run(transport, emails, threads):
+    def send(_):
+        start = time.perf_counter()
+        transport.send(PARAMS)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(send, range(emails)))
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--emails', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.005, help='Stub seconds per request')
+    parser.add_argument('--connect-latency', type=float, default=0.03, help='Stub seconds per new connection')
+    args = parser.parse_args()
+
+    print(f"{'transport':<10}{'threads':>8}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}{'connections':>13}")
+    for threads in (1, args.threads):
+        for name, factory in (('resend', ResendSDKTransport), ('session', SessionTransport)):
+            fake = FakeResend(latency=args.latency, connect_latency=args.connect_latency).start()
+            transport = factory(api_key='re_benchmark', base_url=fake.url)
+            total, latencies = run(transport, args.emails, threads)
+            latencies.sort()
+            print(f"{name:<10}{threads:>8}{total:>10.2f}{statistics.median(latencies) * 1000:>10.1f}"
+                  f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:>10.1f}{fake.stats()['connections']:>13}")
+            if name == 'session':
+                print(f"{'':<10}{transport.stats()}")
+            fake.stop()
+
+
+if __name__ == '__main__':
+    main()
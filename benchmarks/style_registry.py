@@ -0,0 +1,64 @@
+"""
+Measure what the shared style registry saves per PortfolioPDFGenerator
+
+Compares building the paragraph and table styles from scratch, which is
+what every generator did before the registry existed, with looking them
+up in the process-wide registry.
+
+Usage: python benchmarks/style_registry.py [iterations]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_styles import build_colors, build_paragraph_styles, build_table_styles, get_style_registry
+
+
+def build_per_request():
+    palette = build_colors()
+    return build_paragraph_styles(palette), build_table_styles(palette)
+
+
+def lookup_registry():
+    registry = get_style_registry()
+    return registry.paragraph_styles, registry.table_styles
+
+
+def measure(func, iterations):
+    """Return (microseconds per call, bytes retained per call)"""
+    func()  # warm up imports and the registry itself
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+
+    # Keep every result alive so the traced memory is what one call allocates
+    samples = min(iterations, 100)
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    results = [func() for _ in range(samples)]
+    allocated = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del results
+
+    return elapsed / iterations * 1e6, allocated / samples
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    per_request_us, per_request_bytes = measure(build_per_request, iterations)
+    registry_us, registry_bytes = measure(lookup_registry, iterations)
+
+    print(f"{'':<22}{'time/call':>14}{'alloc/call':>14}")
+    print(f"{'per-request build':<22}{per_request_us:>11.1f} us{per_request_bytes:>11.0f} B")
+    print(f"{'shared registry':<22}{registry_us:>11.1f} us{registry_bytes:>11.0f} B")
+    print(f"saved per generator: {per_request_us - registry_us:.1f} us")
+
+
+if __name__ == '__main__':
+    main()
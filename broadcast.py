@@ -0,0 +1,201 @@
+import os
+import time
+import threading
+from datetime import datetime
+from app import app, db
+from models import Newsletter, NewsletterBroadcast, BroadcastRejection
+from email_transport import get_broadcast_transport, error_status, is_permanent_error
+
+# Resend accepts at most 100 emails per batch request
+CHUNK_SIZE = min(int(os.environ.get('BROADCAST_CHUNK_SIZE', 100)), 100)
+# Resend's default API rate limit is 2 requests per second
+RATE_PER_SECOND = float(os.environ.get('BROADCAST_RATE_PER_SECOND', 2))
+BURST = int(os.environ.get('BROADCAST_BURST', 2))
+MAX_RETRIES = int(os.environ.get('BROADCAST_MAX_RETRIES', 5))
+FROM_ADDRESS = os.environ.get('BROADCAST_FROM', 'BizzPulse <onboarding@resend.dev>')
+# Statuses the API uses for a batch containing an invalid email; other 4xx
+# (bad API key, unverified sender) fail every recipient alike
+RECIPIENT_ERROR_STATUSES = (400, 422)
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, up to `capacity` saved up"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Wait until `tokens` are available and take them; returns the time waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class BroadcastError(Exception):
+    """A batch could not be delivered; the broadcast can be resumed later"""
+
+
+class RejectedBatchError(BroadcastError):
+    """The API refused a batch with a 4xx other than 429; resending it cannot help"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def create_broadcast(subject, html, text=None):
+    broadcast = NewsletterBroadcast(subject=subject, html=html, text=text)
+    db.session.add(broadcast)
+    db.session.commit()
+    return broadcast
+
+
+def iter_subscriber_chunks(after_id=0, chunk_size=CHUNK_SIZE):
+    """
+    Yield lists of (id, email) for active subscribers in id order
+
+    Uses keyset pagination on the primary key, so each chunk is one indexed
+    range query and memory stays at one chunk however many subscribers
+    there are.
+    """
+    while True:
+        chunk = db.session.query(Newsletter.id, Newsletter.email).filter(
+            Newsletter.is_active.is_(True),
+            Newsletter.id > after_id
+        ).order_by(Newsletter.id).limit(chunk_size).all()
+        if not chunk:
+            return
+        yield chunk
+        after_id = chunk[-1].id
+
+
+def _build_batch(broadcast, emails):
+    """One email per recipient so subscribers never see each other's address"""
+    batch = []
+    for email in emails:
+        params = {
+            "from": FROM_ADDRESS,
+            "to": [email],
+            "subject": broadcast.subject,
+            "html": broadcast.html,
+        }
+        if broadcast.text:
+            params["text"] = broadcast.text
+        batch.append(params)
+    return batch
+
+
+def send_batch(batch, bucket, max_retries=MAX_RETRIES):
+    """
+    Send one batch request through the rate limiter, retrying with backoff
+
+    Network errors, 429s and 5xx responses are retried; any other 4xx
+    raises RejectedBatchError at once.
+    """
+    for attempt in range(1, max_retries + 1):
+        bucket.acquire()
+        try:
+            response = get_broadcast_transport().send_batch(batch)
+            if hasattr(response, 'get') and response.get('data') is not None:
+                return response['data']
+            error = f"API Error: {response}"
+        except Exception as e:
+            if is_permanent_error(e):
+                raise RejectedBatchError(str(e), error_status(e)) from e
+            error = str(e)
+
+        if attempt < max_retries:
+            delay = min(2 ** attempt, 60)
+            app.logger.warning(f"Broadcast batch failed (attempt {attempt}), retrying in {delay}s: {error}")
+            time.sleep(delay)
+    raise BroadcastError(error)
+
+
+def send_chunk(broadcast, chunk, bucket):
+    """
+    Send a chunk of (id, email) rows, splitting it around refused recipients
+
+    When the API refuses the batch as invalid, each half is sent on its
+    own until the refused recipients are isolated, so one bad address
+    costs about two extra requests per halving instead of the whole chunk.
+    Returns the (row, error) pairs that were refused.
+    """
+    try:
+        send_batch(_build_batch(broadcast, [row.email for row in chunk]), bucket)
+        return []
+    except RejectedBatchError as e:
+        if e.status_code not in RECIPIENT_ERROR_STATUSES:
+            raise
+        if len(chunk) == 1:
+            return [(chunk[0], str(e))]
+    middle = len(chunk) // 2
+    return send_chunk(broadcast, chunk[:middle], bucket) + send_chunk(broadcast, chunk[middle:], bucket)
+
+
+def run_broadcast(broadcast_id, chunk_size=CHUNK_SIZE, bucket=None, progress=None):
+    """
+    Send a broadcast to every active subscriber after its checkpoint
+
+    The checkpoint (last subscriber id and counts) is committed after every
+    batch, so a run that crashes or fails resumes with the next batch when
+    it is started again. A crash between a send and its checkpoint resends
+    at most that one batch. Recipients the API refuses are recorded as
+    BroadcastRejection rows and skipped; if it refuses every recipient of a
+    batch, the problem is the message rather than the addresses and the
+    broadcast stops. Must be called inside an application context.
+    """
+    broadcast = db.session.get(NewsletterBroadcast, broadcast_id)
+    if broadcast is None:
+        raise BroadcastError(f"Broadcast {broadcast_id} does not exist")
+    if broadcast.status == 'completed':
+        return broadcast
+
+    bucket = bucket or TokenBucket(RATE_PER_SECOND, BURST)
+    broadcast.status = 'running'
+    broadcast.started_at = broadcast.started_at or datetime.utcnow()
+    broadcast.last_error = None
+    db.session.commit()
+
+    try:
+        for chunk in iter_subscriber_chunks(broadcast.last_subscriber_id, chunk_size):
+            rejected = send_chunk(broadcast, chunk, bucket)
+            if rejected and len(rejected) == len(chunk) > 1:
+                raise BroadcastError(f"Every recipient in the batch was refused: {rejected[0][1]}")
+            for row, error in rejected:
+                app.logger.warning(f"Broadcast {broadcast.id} skipped {row.email}: {error}")
+                db.session.add(BroadcastRejection(
+                    broadcast_id=broadcast.id, subscriber_id=row.id, email=row.email, error=error[:2000]
+                ))
+            broadcast.last_subscriber_id = chunk[-1].id
+            broadcast.sent_count += len(chunk) - len(rejected)
+            broadcast.rejected_count += len(rejected)
+            broadcast.batch_count += 1
+            db.session.commit()
+            if progress:
+                progress(broadcast)
+    except Exception as e:
+        db.session.rollback()
+        broadcast.status = 'failed'
+        broadcast.last_error = str(e)[:2000]
+        db.session.commit()
+        app.logger.error(f"Broadcast {broadcast.id} stopped after subscriber {broadcast.last_subscriber_id}: {str(e)}")
+        raise
+
+    broadcast.status = 'completed'
+    broadcast.finished_at = datetime.utcnow()
+    db.session.commit()
+    app.logger.info(f"Broadcast {broadcast.id} sent to {broadcast.sent_count} subscribers")
+    return broadcast
@@ -0,0 +1,170 @@
+import os
+import time
+import threading
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """The call was rejected without being attempted because the breaker is open"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"Circuit '{name}' is open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker
+
+    Records the outcome of the last `window` calls. Once at least
+    `min_calls` have been recorded and the share of failures reaches
+    `failure_rate`, the breaker opens and rejects calls for `reset_timeout`
+    seconds. It then lets `half_open_calls` probe calls through: if they all
+    succeed it closes again, and any failure reopens it. Calls slower than
+    `slow_call_seconds` count as failures, so a service that hangs trips
+    the breaker as well as one that errors.
+    """
+
+    def __init__(self, name, failure_rate=0.5, window=20, min_calls=5, reset_timeout=30.0,
+                 half_open_calls=1, slow_call_seconds=None):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.slow_call_seconds = slow_call_seconds
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = None
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+        return self._state
+
+    def retry_after(self):
+        """Seconds until an open breaker lets a probe through"""
+        with self._lock:
+            if self._current_state(time.monotonic()) != OPEN:
+                return 0.0
+            return max(self.reset_timeout - (time.monotonic() - self._opened_at), 0.0)
+
+    def allow(self):
+        """Reserve a call; returns False when it must be rejected"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes_in_flight < self.half_open_calls:
+                self._probes_in_flight += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, success, duration=None):
+        """Record the outcome of a call that allow() let through"""
+        if success and self.slow_call_seconds and duration is not None and duration > self.slow_call_seconds:
+            success = False
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+                if not success:
+                    self._trip()
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_calls:
+                        self._state = CLOSED
+                        self._outcomes.clear()
+                        logger.info(f"Circuit '{self.name}' closed")
+                return
+
+            self._outcomes.append(success)
+            if state == CLOSED and len(self._outcomes) >= self.min_calls:
+                failures = self._outcomes.count(False)
+                if failures / len(self._outcomes) >= self.failure_rate:
+                    self._trip()
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self.times_opened += 1
+        logger.warning(f"Circuit '{self.name}' opened for {self.reset_timeout:g}s")
+
+    def call(self, func, *args, **kwargs):
+        """Run func through the breaker; any exception counts as a failure"""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_after())
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record(False)
+            raise
+        self.record(True, time.monotonic() - start)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._outcomes.clear()
+            self._probes_in_flight = 0
+
+    def stats(self):
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            failures = self._outcomes.count(False)
+            return {
+                'name': self.name,
+                'state': state,
+                'recent_calls': len(self._outcomes),
+                'recent_failure_rate': round(failures / len(self._outcomes), 3) if self._outcomes else 0.0,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+                'retry_after': round(max(self.reset_timeout - (time.monotonic() - self._opened_at), 0.0), 1)
+                               if state == OPEN else 0.0
+            }
+
+
+# Breaker around the Resend API, shared by every transport in the process
+email_breaker = CircuitBreaker(
+    'email',
+    failure_rate=float(os.environ.get('EMAIL_BREAKER_FAILURE_RATE', 0.5)),
+    window=int(os.environ.get('EMAIL_BREAKER_WINDOW', 20)),
+    min_calls=int(os.environ.get('EMAIL_BREAKER_MIN_CALLS', 5)),
+    reset_timeout=float(os.environ.get('EMAIL_BREAKER_RESET_SECONDS', 30)),
+    half_open_calls=int(os.environ.get('EMAIL_BREAKER_HALF_OPEN_CALLS', 1)),
+    slow_call_seconds=float(os.environ.get('EMAIL_SLOW_CALL_SECONDS', 5))
+)
+
+# Newsletter broadcasts get their own breaker: a batch request for 100
+# recipients is slower than a single email, and a broadcast going badly
+# should not open the circuit for contact notifications
+broadcast_breaker = CircuitBreaker(
+    'broadcast',
+    failure_rate=float(os.environ.get('EMAIL_BREAKER_FAILURE_RATE', 0.5)),
+    window=int(os.environ.get('EMAIL_BREAKER_WINDOW', 20)),
+    min_calls=int(os.environ.get('EMAIL_BREAKER_MIN_CALLS', 5)),
+    reset_timeout=float(os.environ.get('EMAIL_BREAKER_RESET_SECONDS', 30)),
+    half_open_calls=int(os.environ.get('EMAIL_BREAKER_HALF_OPEN_CALLS', 1)),
+    slow_call_seconds=float(os.environ.get('BROADCAST_SLOW_CALL_SECONDS', 8))
+)
@@ -0,0 +1,274 @@
+import os
+import re
+import json
+import hashlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import click
+from app import app
+from pdf_generator import PortfolioPDFGenerator, DEFAULT_PORTFOLIO_DATA
+from pdf_jobs import render_to_file, clean_portfolio_data, PortfolioDataError
+from outbox import drain_outbox, BATCH_SIZE
+from broadcast import create_broadcast, run_broadcast, CHUNK_SIZE
+from digest import build_digest, digest_due, WINDOW_MINUTES
+from migrations import upgrade, status, check_indexes
+from subscriptions import import_subscribers, iter_csv_emails, IMPORT_CHUNK_SIZE
+from exports import export_stream, EXPORTS, EXTENSIONS, CHUNK_SIZE as EXPORT_CHUNK_SIZE
+from stats import rebuild_stats
+
+DOWNLOADS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'downloads')
+
+
+def _read_portfolios(path):
+    """Read portfolio records from a JSON array, {"portfolios": [...]} or JSONL file"""
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('portfolios', [data])
+    return data
+
+
+def _slugify(value):
+    return re.sub(r'[^A-Za-z0-9]+', '_', value).strip('_')[:60]
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@app.cli.command('render-portfolios')
+@click.argument('input_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--output-dir', default=DOWNLOADS_DIR, show_default=True,
+              help='Directory the PDFs and manifest are written to.')
+@click.option('--workers', type=int, default=None,
+              help='Number of render processes (defaults to the CPU count).')
+def render_portfolios(input_file, output_dir, workers):
+    """Render many portfolio PDFs in parallel from a JSON or JSONL file"""
+    records = _read_portfolios(input_file)
+    if not records:
+        raise click.ClickException(f"No portfolio records found in {input_file}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    workers = workers or os.cpu_count() or 1
+
+    jobs = []
+    for index, record in enumerate(records, start=1):
+        try:
+            portfolio_data = clean_portfolio_data(record, DEFAULT_PORTFOLIO_DATA)
+        except PortfolioDataError as e:
+            raise click.ClickException(f"Record {index}: {e}")
+        name = _slugify(record.get('name') or portfolio_data['client'] or '')
+        filename = f"BizzPulse_Portfolio_{timestamp}_{index:04d}{'_' + name if name else ''}.pdf"
+        jobs.append((index, filename, portfolio_data))
+
+    click.echo(f"Rendering {len(jobs)} portfolios with {workers} workers")
+    manifest = []
+    failures = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                render_to_file,
+                PortfolioPDFGenerator.__module__,
+                PortfolioPDFGenerator.__name__,
+                portfolio_data,
+                os.path.join(output_dir, filename)
+            ): (index, filename, portfolio_data)
+            for index, filename, portfolio_data in jobs
+        }
+
+        for future in as_completed(futures):
+            index, filename, portfolio_data = futures[future]
+            try:
+                size = future.result()
+            except Exception as e:
+                failures += 1
+                click.echo(f"  [{index}] {filename} failed: {str(e)}", err=True)
+                continue
+
+            manifest.append({
+                'index': index,
+                'file': filename,
+                'title': portfolio_data['title'],
+                'client': portfolio_data['client'],
+                'size': size,
+                'sha256': _sha256(os.path.join(output_dir, filename))
+            })
+            click.echo(f"  [{index}] {filename} ({size} bytes)")
+
+    manifest.sort(key=lambda entry: entry['index'])
+    manifest_path = os.path.join(output_dir, f"BizzPulse_Portfolio_{timestamp}_manifest.json")
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated_at': datetime.now().isoformat(),
+            'source': os.path.basename(input_file),
+            'count': len(manifest),
+            'failed': failures,
+            'files': manifest
+        }, f, indent=2)
+
+    click.echo(f"Wrote {len(manifest)} PDFs and manifest {manifest_path}")
+    if failures:
+        raise click.ClickException(f"{failures} portfolios failed to render")
+
+
+@app.cli.command('drain-outbox')
+@click.option('--batch-size', type=int, default=None, help='Entries to deliver per batch.')
+def drain_outbox_command(batch_size):
+    """Deliver every due email in the outbox, then exit"""
+    batch_size = batch_size or BATCH_SIZE
+    totals = {'sent': 0, 'failed': 0}
+    while True:
+        result = drain_outbox(batch_size)
+        totals['sent'] += result['sent']
+        totals['failed'] += result['failed']
+        if result['sent'] + result['failed'] < batch_size:
+            break
+    click.echo(f"Sent {totals['sent']} emails, {totals['failed']} failed and will be retried")
+
+
+@app.cli.command('broadcast-newsletter')
+@click.option('--subject', default=None, help='Subject line of a new broadcast.')
+@click.option('--html-file', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='HTML body of a new broadcast.')
+@click.option('--text-file', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='Optional plain text body.')
+@click.option('--resume', 'resume_id', type=int, default=None,
+              help='Resume an earlier broadcast from its checkpoint instead.')
+@click.option('--chunk-size', type=int, default=CHUNK_SIZE, show_default=True,
+              help='Subscribers per batch request (at most 100).')
+def broadcast_newsletter(subject, html_file, text_file, resume_id, chunk_size):
+    """Send a newsletter to every active subscriber"""
+    if resume_id is None:
+        if not subject or not html_file:
+            raise click.UsageError('--subject and --html-file are required unless --resume is given')
+        with open(html_file, encoding='utf-8') as f:
+            html = f.read()
+        text = None
+        if text_file:
+            with open(text_file, encoding='utf-8') as f:
+                text = f.read()
+        broadcast_id = create_broadcast(subject, html, text).id
+        click.echo(f"Created broadcast {broadcast_id}")
+    else:
+        broadcast_id = resume_id
+
+    def progress(broadcast):
+        if broadcast.batch_count % 10 == 0:
+            click.echo(f"  {broadcast.sent_count} sent (through subscriber {broadcast.last_subscriber_id})")
+
+    try:
+        broadcast = run_broadcast(broadcast_id, chunk_size=min(chunk_size, 100), progress=progress)
+    except Exception as e:
+        raise click.ClickException(
+            f"Broadcast {broadcast_id} stopped: {str(e)}. Run again with --resume {broadcast_id}"
+        )
+    click.echo(f"Broadcast {broadcast.id} {broadcast.status}: {broadcast.sent_count} emails "
+               f"in {broadcast.batch_count} batches, {broadcast.rejected_count} recipients refused")
+
+
+@app.cli.command('send-admin-digest')
+@click.option('--force', is_flag=True, help='Send now even if the digest window has not passed.')
+def send_admin_digest(force):
+    """Queue a digest of the contacts received since the last one"""
+    if not force and not digest_due():
+        click.echo(f"No digest due (window is {WINDOW_MINUTES} minutes); use --force to send anyway")
+        return
+    admin_email = os.environ.get('ADMIN_EMAIL', 'harshilgajjar602@gmail.com')
+    digest = build_digest(admin_email)
+    if digest is None:
+        click.echo("No new contacts since the last digest")
+        return
+    click.echo(f"Queued digest {digest.id} with {digest.contact_count} contacts "
+               f"({digest.priority_count} high priority); run drain-outbox or let the worker send it")
+
+
+@app.cli.command('db-upgrade')
+def db_upgrade():
+    """Create missing tables and apply pending schema migrations"""
+    applied = upgrade()
+    for version, description, done in status():
+        click.echo(f"  [{'x' if done else ' '}] {version:03d} {description}")
+    click.echo(f"Applied {len(applied)} migrations" if applied else "Schema is up to date")
+
+
+@app.cli.command('db-check-indexes')
+@click.option('--verbose', '-v', is_flag=True, help='Print every query plan.')
+def db_check_indexes(verbose):
+    """EXPLAIN the admin listing queries and fail if one does not use its index"""
+    failures = 0
+    for description, ok, plan in check_indexes():
+        failures += not ok
+        click.echo(f"  {'ok  ' if ok else 'FAIL'} {description}")
+        if verbose or not ok:
+            for line in plan:
+                click.echo(f"         {line}")
+    if failures:
+        raise click.ClickException(f"{failures} admin queries do not use their indexes; run flask db-upgrade")
+    click.echo("All admin listing queries use their indexes")
+
+
+@app.cli.command('export')
+@click.argument('name', type=click.Choice(list(EXPORTS)))
+@click.option('--format', 'fmt', type=click.Choice(list(EXTENSIONS)), default='ndjson', show_default=True)
+@click.option('--output', '-o', default='-', show_default=True, help='File to write; - for stdout.')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output (implied by a .gz output name).')
+@click.option('--filter', 'filters', multiple=True, metavar='KEY=VALUE',
+              help='Listing filter, e.g. is_read=false or since=2024-01-01. Repeatable.')
+@click.option('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, show_default=True, help='Rows fetched per round trip.')
+def export(name, fmt, output, compress, filters, chunk_size):
+    """Stream every contact or newsletter subscriber to a file"""
+    try:
+        filters = dict(item.split('=', 1) for item in filters)
+    except ValueError:
+        raise click.BadParameter('filters must look like KEY=VALUE', param_hint='--filter')
+    compress = compress or output.endswith('.gz')
+    try:
+        stream = export_stream(name, fmt, filters, compress, chunk_size)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    size = 0
+    with click.open_file(output, 'wb') as f:
+        for chunk in stream:
+            f.write(chunk)
+            size += len(chunk)
+    if output != '-':
+        click.echo(f"Wrote {size} bytes of {name} to {output}")
+
+
+@app.cli.command('import-newsletter')
+@click.argument('path')
+@click.option('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, show_default=True, help='Addresses per upsert.')
+def import_newsletter(path, chunk_size):
+    """Bulk-subscribe the addresses in a CSV file (- for stdin)"""
+    chunks = [0]
+
+    def progress(counts):
+        chunks[0] += 1
+        if chunks[0] % 50 == 0:
+            click.echo(f"  {counts['rows']} rows: {counts['inserted']} inserted, {counts['reactivated']} reactivated")
+
+    with click.open_file(path, encoding='utf-8-sig') as f:
+        counts = import_subscribers(iter_csv_emails(f), chunk_size, progress)
+    click.echo(
+        f"Read {counts['rows']} rows: {counts['inserted']} inserted, {counts['reactivated']} reactivated, "
+        f"{counts['skipped']} skipped, {counts['invalid']} invalid"
+    )
+
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the admin statistics from the contacts and subscriptions"""
+    before, after = rebuild_stats()
+    for name, value in after.items():
+        drift = value - before.get(name, 0)
+        click.echo(f"  {name:<20}{value:>10}" + (f"  (was {before.get(name, 0)})" if drift else ''))
+    click.echo("Statistics rebuilt")
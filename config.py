@@ -3,22 +3,17 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Pool and SQLite settings are read from the environment on import
+from db_pool import get_database_url, engine_options  # noqa: E402
+
 class Config:
     """Base configuration"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_recycle': 300,
-        'pool_pre_ping': True,
-        'pool_size': 10,
-        'max_overflow': 20
-    }
     
-    # Database
-    DATABASE_URL = os.environ.get('DATABASE_URL')
-    if DATABASE_URL and DATABASE_URL.startswith('postgres://'):
-        DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
-    SQLALCHEMY_DATABASE_URI = DATABASE_URL or 'sqlite:///local.db'
+    # Database; pool sizes follow the gunicorn worker model (see db_pool)
+    SQLALCHEMY_DATABASE_URI = get_database_url(default='sqlite:///local.db')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     
     # Email
     RESEND_API_KEY = os.environ.get('RESEND_API_KEY')
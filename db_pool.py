@@ -0,0 +1,179 @@
+"""
+Database connection pool sizing and instrumentation
+
+Pool sizes follow from the worker model instead of fixed per-process
+numbers: each gunicorn worker process needs one connection per request
+thread plus one for the outbox worker thread, and the whole deployment
+shares a DB_MAX_CONNECTIONS budget, which caps the overflow. app.py and
+config.py both take their engine options from engine_options().
+
+InstrumentedQueuePool times every checkout, including the wait for a
+free connection, and counts connects, timeouts, invalidations and failed
+pre-pings, so the sizes can be set from data; see pool_stats().
+"""
+import os
+import time
+import weakref
+import threading
+import statistics
+from collections import deque
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from sqlite_backend import BUSY_TIMEOUT_MS
+
+# Gunicorn reads WEB_CONCURRENCY for its worker count; the start commands
+# pass it as --workers with this same default, or (render.yaml) set it
+# explicitly, so both agree
+WORKERS = int(os.environ.get('WEB_CONCURRENCY', 4))
+THREADS = int(os.environ.get('GUNICORN_THREADS', 1))
+# Long-lived threads per process that hold a connection: the outbox worker
+BACKGROUND_CONNECTIONS = 1
+# Connections the whole deployment may open
+MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', 20))
+
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', THREADS + BACKGROUND_CONNECTIONS))
+MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', max(MAX_CONNECTIONS // WORKERS - POOL_SIZE, 0)))
+POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 300))
+
+# Checkout waits kept for the percentiles
+WAIT_SAMPLES = 1000
+
+_instrumented_pools = weakref.WeakSet()
+
+
+def get_database_url(default='sqlite:///database.db'):
+    """DATABASE_URL with Heroku-style postgres:// fixed, or the SQLite default"""
+    url = os.environ.get('DATABASE_URL') or default
+    if url.startswith('postgres://'):
+        url = url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+
+def engine_options(url):
+    """SQLALCHEMY_ENGINE_OPTIONS for the database at `url`"""
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            # In-memory databases live in a single connection
+            return {}
+        options = {'connect_args': {'timeout': BUSY_TIMEOUT_MS / 1000}}
+    else:
+        options = {'pool_recycle': POOL_RECYCLE, 'pool_pre_ping': True}
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT
+    )
+    return options
+
+
+class PoolStats:
+    """Counters and recent checkout waits for one pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self.connects = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.pre_ping_failures = 0
+        self.max_wait = 0.0
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self._waits.append(seconds)
+            self.max_wait = max(self.max_wait, seconds)
+
+    def increment(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            counters = {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'invalidations': self.invalidations,
+                'pre_ping_failures': self.pre_ping_failures,
+            }
+            max_wait = self.max_wait
+        wait = {'samples': len(waits), 'max_ms': round(max_wait * 1000, 3)}
+        if waits:
+            wait.update(
+                mean_ms=round(statistics.fmean(waits) * 1000, 3),
+                p50_ms=round(waits[len(waits) // 2] * 1000, 3),
+                p99_ms=round(waits[min(int(len(waits) * 0.99), len(waits) - 1)] * 1000, 3)
+            )
+        return {**counters, 'checkout_wait': wait}
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        _instrumented_pools.add(self)
+        # recreate() (on dispose) hands the new pool our listeners through
+        # _dispatch, and our stats with them
+        if '_dispatch' not in kwargs:
+            stats = self.stats
+            event.listen(self, 'connect', lambda *_: stats.increment('connects'))
+            event.listen(self, 'checkout', lambda *_: stats.increment('checkouts'))
+            event.listen(self, 'invalidate', lambda *_: stats.increment('invalidations'))
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.stats.increment('timeouts')
+            raise
+        finally:
+            self.stats.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+@event.listens_for(Engine, 'handle_error')
+def _count_pre_ping_failures(context):
+    # A failed pre-ping is reported without an engine, only its dialect
+    if not context.is_pre_ping:
+        return
+    for pool in list(_instrumented_pools):
+        if pool._dialect is context.dialect:
+            pool.stats.increment('pre_ping_failures')
+            break
+
+
+def pool_stats(engine):
+    """Configuration, live state and counters of `engine`'s pool"""
+    pool = engine.pool
+    stats = {
+        'class': type(pool).__name__,
+        'workers': WORKERS,
+        'threads': THREADS,
+        'max_connections': MAX_CONNECTIONS,
+    }
+    if isinstance(pool, QueuePool):
+        stats.update(
+            pool_size=pool.size(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0)
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(pool.stats.snapshot())
+    return stats
@@ -0,0 +1,155 @@
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import false, text, update
+from app import app, db
+from models import Contact, AdminDigest
+from outbox import enqueue_email, local_time, outbox_enabled, outbox_worker
+from sqlite_backend import retry_locked
+
+# 0 sends one notification per contact, as before
+WINDOW_MINUTES = int(os.environ.get('ADMIN_DIGEST_WINDOW_MINUTES', 0))
+PRIORITY_KEYWORDS = tuple(
+    keyword.strip().lower()
+    for keyword in os.environ.get('ADMIN_DIGEST_PRIORITY_KEYWORDS', 'urgent,asap,emergency').split(',')
+    if keyword.strip()
+)
+# Contacts listed in full in one digest; the rest are only counted
+MAX_ITEMS = int(os.environ.get('ADMIN_DIGEST_MAX_ITEMS', 50))
+MESSAGE_PREVIEW_CHARS = 600
+
+TIME_FORMAT = '%B %d, %Y at %I:%M %p'
+
+
+def digest_enabled():
+    """Digest mode needs the outbox, which needs a database"""
+    return WINDOW_MINUTES > 0 and outbox_enabled()
+
+
+def is_priority(contact_data):
+    """High-priority submissions still notify the admin immediately"""
+    subject = (contact_data.get('subject') or '').lower()
+    return any(keyword in subject for keyword in PRIORITY_KEYWORDS)
+
+
+def _contact_entry(contact):
+    message = contact.message
+    if len(message) > MESSAGE_PREVIEW_CHARS:
+        message = message[:MESSAGE_PREVIEW_CHARS].rstrip() + '...'
+    return {
+        'name': contact.name,
+        'email': contact.email,
+        'phone': contact.phone,
+        'company': contact.company,
+        'subject': contact.subject,
+        'message': message,
+        'created_at': local_time(contact.created_at).strftime(TIME_FORMAT),
+        'priority': is_priority({'subject': contact.subject})
+    }
+
+
+def _lock_digests():
+    """
+    Make concurrent digest builds wait for this transaction to end
+
+    On PostgreSQL a self-conflicting table lock, which still lets readers
+    through; on SQLite any write statement takes the database write lock,
+    so an UPDATE that matches nothing does.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(text("LOCK TABLE admin_digests IN SHARE ROW EXCLUSIVE MODE"))
+    else:
+        db.session.execute(update(AdminDigest).where(false()).values(id=AdminDigest.id))
+
+
+@retry_locked(db.session)
+def build_digest(admin_email, now=None):
+    """
+    Queue a digest of the unread contacts no digest has reported yet
+
+    The digest claims its contacts with one UPDATE setting their
+    digest_id, rather than by an id range: ids are handed out when a
+    transaction starts, not when it commits, so a contact committed late
+    with a lower id would otherwise fall behind the previous digest's range
+    and never be reported. Workers building a digest at the same time are
+    serialised by _lock_digests(), so the later one finds the contacts
+    claimed. Adds the AdminDigest row, the claim and the 'admin_digest'
+    outbox email in one transaction and returns the digest, or None when
+    there is nothing new.
+    """
+    now = now or datetime.utcnow()
+    unclaimed = db.and_(
+        Contact.digest_id.is_(None),
+        Contact.created_at <= now,
+        Contact.is_read.is_(False)
+    )
+    if db.session.query(Contact.id).filter(unclaimed).first() is None:
+        return None
+
+    _lock_digests()
+    pending = Contact.query.filter(unclaimed)
+    first_id, last_id, first_created = pending.with_entities(
+        db.func.min(Contact.id), db.func.max(Contact.id), db.func.min(Contact.created_at)
+    ).one()
+    if first_id is None:
+        # Claimed by another worker while we waited for the lock
+        db.session.rollback()
+        return None
+
+    previous = AdminDigest.query.order_by(AdminDigest.id.desc()).first()
+    digest = AdminDigest(
+        after_contact_id=first_id - 1,
+        last_contact_id=last_id,
+        window_start=previous.window_end if previous else first_created,
+        window_end=now
+    )
+    db.session.add(digest)
+    db.session.flush()
+    total = pending.update({'digest_id': digest.id}, synchronize_session=False)
+
+    claimed = Contact.query.filter(Contact.digest_id == digest.id)
+    contacts = claimed.order_by(Contact.id).limit(MAX_ITEMS).all()
+    entries = [_contact_entry(contact) for contact in contacts]
+    digest.contact_count = total
+    digest.priority_count = claimed.filter(db.or_(
+        *[db.func.lower(Contact.subject).contains(keyword) for keyword in PRIORITY_KEYWORDS]
+    )).count() if PRIORITY_KEYWORDS else 0
+    enqueue_email('admin_digest', {
+        'admin_email': admin_email,
+        'digest': {
+            'total': total,
+            'priority_count': digest.priority_count,
+            'omitted': max(total - len(entries), 0),
+            'window_start': local_time(digest.window_start).strftime(TIME_FORMAT),
+            'window_end': local_time(now).strftime(TIME_FORMAT),
+            'contacts': entries
+        }
+    })
+    db.session.commit()
+    return digest
+
+
+def digest_due(now=None):
+    """A window has passed since the last digest, or since the oldest contact if there is none"""
+    now = now or datetime.utcnow()
+    previous = AdminDigest.query.order_by(AdminDigest.window_end.desc()).first()
+    if previous is not None:
+        window_start = previous.window_end
+    else:
+        window_start = db.session.query(db.func.min(Contact.created_at)).filter(Contact.is_read.is_(False)).scalar()
+        if window_start is None:
+            return False
+    return now - window_start >= timedelta(minutes=WINDOW_MINUTES)
+
+
+def send_digest_if_due():
+    """Periodic task run by the outbox worker inside an application context"""
+    if not digest_enabled() or not digest_due():
+        return None
+    admin_email = os.environ.get('ADMIN_EMAIL', 'harshilgajjar602@gmail.com')
+    digest = build_digest(admin_email)
+    if digest:
+        app.logger.info(f"Queued admin digest {digest.id} with {digest.contact_count} contacts")
+    return digest
+
+
+outbox_worker.add_task(send_digest_if_due)
@@ -0,0 +1,161 @@
+import os
+import time
+import threading
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from circuit_breaker import email_breaker, OPEN, CLOSED
+
+logger = logging.getLogger(__name__)
+
+WORKERS = int(os.environ.get('EMAIL_DISPATCH_WORKERS', 8))
+DEADLINE = float(os.environ.get('EMAIL_DISPATCH_DEADLINE', 15))
+DEFER_MAX_QUEUED = int(os.environ.get('EMAIL_DEFER_MAX_QUEUED', 1000))
+DEFER_MAX_AGE = float(os.environ.get('EMAIL_DEFER_MAX_AGE', 3600))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process-wide bounded pool shared by every request that sends email"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='email-dispatch')
+    return _executor
+
+
+def _call(send, args):
+    try:
+        return send(*args)
+    except Exception as e:
+        return False, str(e)
+
+
+def dispatch_emails(sends, deadline=DEADLINE):
+    """
+    Run several email sends concurrently and wait for all of them
+
+    Args:
+        sends: Dictionary of name -> (send function, args tuple); each
+            function returns (success, result) like the email services
+        deadline: Seconds to wait for the whole group
+
+    Returns:
+        Dictionary of name -> (success, result). A send that misses the
+        deadline is reported as failed; it keeps running in the pool and
+        its outcome is only logged by the email service.
+    """
+    start = time.monotonic()
+    executor = get_executor()
+    futures = {name: executor.submit(_call, send, args) for name, (send, args) in sends.items()}
+    wait(futures.values(), timeout=deadline)
+
+    results = {}
+    for name, future in futures.items():
+        if future.done():
+            results[name] = future.result()
+        else:
+            results[name] = (False, f"Timed out after {deadline:g}s")
+            logger.warning(f"Email '{name}' did not finish within {deadline:g}s")
+    logger.debug(f"Dispatched {len(sends)} emails in {(time.monotonic() - start) * 1000:.0f} ms")
+    return results
+
+
+class DeferredEmails:
+    """
+    In-memory queue of sends held back while the email circuit is open
+
+    A single background thread waits for the breaker to let calls through
+    again and then sends the queued emails in order, so requests can
+    answer at once instead of waiting on an API that is down. Used where
+    there is no database outbox; the queue lives in this process only, so
+    it is bounded and entries older than `max_age` seconds are dropped.
+    """
+
+    def __init__(self, breaker=email_breaker, max_queued=DEFER_MAX_QUEUED, max_age=DEFER_MAX_AGE):
+        self.breaker = breaker
+        self.max_queued = max_queued
+        self.max_age = max_age
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def add(self, name, send, args):
+        with self._cond:
+            if len(self._queue) >= self.max_queued:
+                self._queue.popleft()
+                self.dropped += 1
+                logger.error("Deferred email queue full, dropped the oldest email")
+            self._queue.append((time.monotonic(), name, send, args))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='email-deferred', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                entry = self._queue[0]
+            queued_at, name, send, args = entry
+
+            if time.monotonic() - queued_at > self.max_age:
+                self._finish(entry, 'dropped')
+                logger.error(f"Deferred email '{name}' expired before the email service recovered")
+                continue
+
+            retry_after = self.breaker.retry_after()
+            if retry_after:
+                time.sleep(min(retry_after, 5))
+                continue
+
+            success, result = _call(send, args)
+            if success or self.breaker.state == CLOSED:
+                # Either sent, or failed for a reason the breaker does not
+                # count (the email service has logged it); don't retry
+                self._finish(entry, 'sent' if success else 'failed')
+            else:
+                # Circuit reopened, or another probe is in flight
+                time.sleep(1)
+
+    def _finish(self, entry, outcome):
+        with self._cond:
+            # add() may have dropped it already if the queue overflowed
+            if self._queue and self._queue[0] is entry:
+                self._queue.popleft()
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def stats(self):
+        with self._cond:
+            return {'queued': len(self._queue), 'sent': self.sent, 'failed': self.failed, 'dropped': self.dropped}
+
+
+deferred_emails = DeferredEmails()
+
+
+def send_or_defer(sends, deadline=DEADLINE, breaker=email_breaker):
+    """
+    dispatch_emails(), falling back to the deferred queue while the circuit is open
+
+    When the breaker is already open nothing is attempted and every send is
+    deferred, so the caller returns immediately. Sends that fail because the
+    breaker opened during this call are deferred too. Deferred sends are
+    reported as (False, 'deferred ...').
+    """
+    if breaker.state == OPEN:
+        results = {}
+    else:
+        results = dispatch_emails(sends, deadline)
+
+    for name, (send, args) in sends.items():
+        if name not in results or (not results[name][0] and breaker.state == OPEN):
+            deferred_emails.add(name, send, args)
+            results[name] = (False, 'deferred until the email service recovers')
+    return results
@@ -0,0 +1,72 @@
+import os
+import threading
+from datetime import datetime
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup, escape
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'email')
+
+_env = None
+_env_lock = threading.Lock()
+_templates = {}
+
+
+def _nl2br(value):
+    """Escape text and turn its line breaks into <br> tags"""
+    return escape(value).replace('\n', Markup('<br>'))
+
+
+def get_environment():
+    """
+    Process-wide Jinja environment for email bodies
+
+    HTML templates are autoescaped so form input cannot inject markup into
+    the admin notification; text templates are rendered as-is. Templates
+    never change at runtime, so auto_reload is off and each one is compiled
+    once per process.
+    """
+    global _env
+    if _env is None:
+        with _env_lock:
+            if _env is None:
+                env = Environment(
+                    loader=FileSystemLoader(TEMPLATE_DIR),
+                    autoescape=select_autoescape(['html']),
+                    auto_reload=False,
+                    trim_blocks=True,
+                    lstrip_blocks=True,
+                    keep_trailing_newline=True
+                )
+                env.filters['nl2br'] = _nl2br
+                _env = env
+    return _env
+
+
+def _template(name):
+    template = _templates.get(name)
+    if template is None:
+        template = _templates[name] = get_environment().get_template(name)
+    return template
+
+
+def render_email(name, contact=None, detailed=True, now=None, **extra):
+    """
+    Render the HTML and text bodies of an email template
+
+    Args:
+        name: Template name without extension, e.g. 'contact_notification'
+        contact: Dictionary containing contact form data
+        detailed: Include the extra sections of the full site's emails
+        now: Submission time shown in the email (defaults to now)
+        **extra: Further template variables
+
+    Returns:
+        Tuple of (html, text)
+    """
+    context = {
+        'contact': contact,
+        'detailed': detailed,
+        'submitted': (now or datetime.now()).strftime('%B %d, %Y at %I:%M %p'),
+        **extra
+    }
+    return _template(f"{name}.html").render(context), _template(f"{name}.txt").render(context)
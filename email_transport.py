@@ -0,0 +1,304 @@
+import os
+import json
+import time
+import threading
+import logging
+from circuit_breaker import email_breaker, broadcast_breaker, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+RESEND_API_URL = os.environ.get('RESEND_API_URL', 'https://api.resend.com')
+CONNECT_TIMEOUT = float(os.environ.get('EMAIL_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.environ.get('EMAIL_READ_TIMEOUT', 5))
+# Wall-clock bound on one API call, connect and whole response included
+CALL_DEADLINE = float(os.environ.get('EMAIL_CALL_DEADLINE', 8))
+# Response bodies are read in pieces of this size, checking the deadline
+READ_CHUNK_SIZE = 8192
+POOL_SIZE = int(os.environ.get('EMAIL_POOL_SIZE', 10))
+
+
+class EmailTransportError(Exception):
+    """The email API rejected a request or could not be reached"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class DeadlineExceededError(EmailTransportError):
+    """The API call ran past its deadline"""
+
+
+def error_status(error):
+    """HTTP status code carried by a transport or Resend SDK error, or None"""
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    try:
+        return int(status)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_permanent_error(error):
+    """A 4xx other than 429: the API refused the request and resending it cannot help"""
+    status = error_status(error)
+    return status is not None and 400 <= status < 500 and status != 429
+
+
+class ResendSDKTransport:
+    """
+    Send through the resend package
+
+    The SDK opens a new HTTPS connection for every call; kept as a fallback
+    (EMAIL_TRANSPORT=resend). Like SessionTransport, 4xx errors other than
+    429 do not count against the API in the circuit breaker.
+    """
+
+    name = 'resend'
+
+    def __init__(self, api_key=None, base_url=RESEND_API_URL, breaker=email_breaker):
+        import resend
+        self._resend = resend
+        resend.api_key = api_key or os.environ.get('RESEND_API_KEY')
+        resend.api_url = base_url
+        self.breaker = breaker
+        self.sends = 0
+
+    def _call(self, func, payload):
+        if not self.breaker.allow():
+            raise CircuitOpenError(self.breaker.name, self.breaker.retry_after())
+        self.sends += 1
+        start = time.monotonic()
+        try:
+            result = func(payload)
+        except Exception as e:
+            # A rejected request (bad address, say) says nothing about the API's health
+            self.breaker.record(is_permanent_error(e), time.monotonic() - start)
+            raise
+        self.breaker.record(True, time.monotonic() - start)
+        return result
+
+    def send(self, params):
+        return self._call(self._resend.Emails.send, params)
+
+    def send_batch(self, batch):
+        return self._call(self._resend.Batch.send, batch)
+
+    def stats(self):
+        return {'transport': self.name, 'requests': self.sends}
+
+
+class SessionTransport:
+    """
+    Send through one pooled keep-alive requests.Session
+
+    Connections to the API are kept open between sends, so a burst of
+    emails pays for one TCP and TLS handshake per pooled connection instead
+    of one per email. Every request has explicit connect and read timeouts
+    and a wall-clock deadline covering the whole response, body included
+    (the read timeout is capped at the deadline), and goes through the
+    circuit breaker: network errors, 429s, 5xx responses and slow calls
+    count against the API, while other 4xx responses (a bad address, say)
+    do not. Safe to share between threads; the pool holds up to
+    `pool_size` connections.
+    """
+
+    name = 'session'
+
+    def __init__(self, api_key=None, base_url=RESEND_API_URL, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, deadline=CALL_DEADLINE, pool_size=POOL_SIZE, breaker=email_breaker):
+        self.api_key = api_key or os.environ.get('RESEND_API_KEY')
+        self.base_url = base_url.rstrip('/')
+        self.connect_timeout = connect_timeout
+        self.read_timeout = min(read_timeout, deadline)
+        self.deadline = deadline
+        self.pool_size = pool_size
+        self.breaker = breaker
+        self._timeout = None
+        self._session = None
+        self._adapter = None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+
+    def _get_session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    from urllib3.util import Timeout
+
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    session = requests.Session()
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers.update({
+                        'Authorization': f"Bearer {self.api_key}",
+                        'Accept': 'application/json',
+                        'User-Agent': 'bizzpulse-email-transport'
+                    })
+                    self._timeout = Timeout(connect=self.connect_timeout, read=self.read_timeout,
+                                            total=self.deadline)
+                    self._adapter = adapter
+                    self._session = session
+        return self._session
+
+    def _post(self, path, payload):
+        if not self.breaker.allow():
+            raise CircuitOpenError(self.breaker.name, self.breaker.retry_after())
+
+        session = self._get_session()
+        start = time.perf_counter()
+        try:
+            # Timeout(total=deadline) bounds connecting and waiting for the
+            # headers; _read_body() bounds the rest
+            response = session.post(f"{self.base_url}{path}", json=payload, timeout=self._timeout, stream=True)
+            body = self._read_body(response, start)
+        except Exception as e:
+            self._record(start, error=True)
+            self.breaker.record(False)
+            if isinstance(e, EmailTransportError):
+                raise
+            raise EmailTransportError(f"{type(e).__name__}: {str(e)}")
+
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = {'message': body[:500].decode('utf-8', 'replace')}
+        duration = self._record(start, error=response.status_code >= 400)
+        self.breaker.record(response.status_code < 500 and response.status_code != 429, duration)
+
+        if response.status_code >= 400:
+            message = data.get('message', 'Unknown error') if isinstance(data, dict) else data
+            raise EmailTransportError(f"{response.status_code}: {message}", response.status_code)
+        return data
+
+    def _read_body(self, response, start):
+        """
+        Read the response body, each socket read limited to the time left
+
+        A per-read timeout alone lets a server trickling a byte at a time
+        hold the call open indefinitely.
+        """
+        raw = response.raw
+        sock = getattr(raw.connection, 'sock', None) if raw.connection is not None else None
+        # read1() (urllib3 2.x) returns whatever one socket read brings; 1.x
+        # only has read(), which waits for a whole chunk, a read timeout per
+        # socket read, before the deadline is checked again
+        read = getattr(raw, 'read1', None) or raw.read
+        chunks = []
+        try:
+            while True:
+                remaining = self.deadline - (time.perf_counter() - start)
+                if remaining <= 0:
+                    raise DeadlineExceededError(f"No complete response within {self.deadline:g}s")
+                if sock is not None:
+                    sock.settimeout(min(remaining, self.read_timeout))
+                chunk = read(READ_CHUNK_SIZE, decode_content=True)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        except BaseException:
+            # Drop the connection rather than return a half-read one to the pool
+            response.close()
+            raise
+        if sock is not None:
+            sock.settimeout(self.read_timeout)
+        raw.release_conn()
+        return b''.join(chunks)
+
+    def _record(self, start, error=False):
+        duration = time.perf_counter() - start
+        with self._lock:
+            self.requests += 1
+            self.errors += error
+            self.total_seconds += duration
+        return duration
+
+    def send(self, params):
+        return self._post('/emails', params)
+
+    def send_batch(self, batch):
+        return self._post('/emails/batch', batch)
+
+    def stats(self):
+        """Request counts plus connections opened and requests served per pool"""
+        connections = pooled_requests = 0
+        if self._adapter is not None:
+            for key in list(self._adapter.poolmanager.pools.keys()):
+                pool = self._adapter.poolmanager.pools.get(key)
+                if pool is not None:
+                    connections += pool.num_connections
+                    pooled_requests += pool.num_requests
+        with self._lock:
+            return {
+                'transport': self.name,
+                'requests': self.requests,
+                'errors': self.errors,
+                'avg_ms': round(self.total_seconds / self.requests * 1000, 2) if self.requests else None,
+                'connections_opened': connections,
+                'connections_reused': max(pooled_requests - connections, 0),
+                'timeouts': {'connect': self.connect_timeout, 'read': self.read_timeout, 'deadline': self.deadline}
+            }
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = self._adapter = None
+
+
+TRANSPORTS = {
+    'session': SessionTransport,
+    'resend': ResendSDKTransport,
+}
+
+_transport = None
+_broadcast_transport = None
+_transport_lock = threading.Lock()
+
+
+def _new_transport(breaker):
+    """A transport of the class chosen by EMAIL_TRANSPORT (default: session)"""
+    name = os.environ.get('EMAIL_TRANSPORT', 'session')
+    if name not in TRANSPORTS:
+        logger.warning(f"Unknown EMAIL_TRANSPORT {name!r}, using session")
+        name = 'session'
+    return TRANSPORTS[name](breaker=breaker)
+
+
+def get_transport():
+    """Process-wide transport for single emails, behind email_breaker"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = _new_transport(email_breaker)
+    return _transport
+
+
+def set_transport(transport):
+    """Replace the process-wide transport, e.g. with one pointed at a fake server"""
+    global _transport
+    with _transport_lock:
+        _transport = transport
+    return transport
+
+
+def get_broadcast_transport():
+    """Process-wide transport for newsletter broadcasts, behind broadcast_breaker"""
+    global _broadcast_transport
+    if _broadcast_transport is None:
+        with _transport_lock:
+            if _broadcast_transport is None:
+                _broadcast_transport = _new_transport(broadcast_breaker)
+    return _broadcast_transport
+
+
+def set_broadcast_transport(transport):
+    """Replace the broadcast transport"""
+    global _broadcast_transport
+    with _transport_lock:
+        _broadcast_transport = transport
+    return transport
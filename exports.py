@@ -0,0 +1,190 @@
+"""
+Streaming bulk export of contacts and newsletter subscribers
+
+Rows are read in chunks through a streaming (server-side on PostgreSQL)
+cursor and each chunk is encoded and handed on before the next is
+fetched, so memory stays flat however many rows there are. Formats are
+NDJSON, CSV and, when pyarrow is installed, Parquet and Arrow IPC; any of
+them can be gzip-compressed on the fly.
+"""
+import io
+import os
+import csv
+import json
+import zlib
+from datetime import datetime
+from app import db
+from models import Contact, Newsletter
+from admin_queries import contact_listing_query, newsletter_listing_query
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+GZIP_LEVEL = 6
+
+# name -> (filtered query builder, exported columns in order)
+EXPORTS = {
+    'contacts': (contact_listing_query, [
+        Contact.id, Contact.name, Contact.email, Contact.phone, Contact.company,
+        Contact.subject, Contact.message, Contact.created_at, Contact.is_read, Contact.is_archived
+    ]),
+    'newsletters': (newsletter_listing_query, [
+        Newsletter.id, Newsletter.email, Newsletter.subscribed_at, Newsletter.is_active
+    ]),
+}
+
+# Formats available in this install (Parquet and Arrow only with pyarrow)
+EXTENSIONS = {'ndjson': 'ndjson', 'csv': 'csv'}
+if pa is not None:
+    EXTENSIONS.update(parquet='parquet', arrow='arrow')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+
+class ExportError(ValueError):
+    """An export was requested in an unknown or unavailable format"""
+
+
+def iter_chunks(query, chunk_size=CHUNK_SIZE):
+    """Lists of row tuples from `query`, fetched `chunk_size` at a time"""
+    result = db.session.execute(query.statement, execution_options={'yield_per': chunk_size})
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return _json_value(value)
+
+
+def write_ndjson(chunks, names):
+    for rows in chunks:
+        lines = [json.dumps(dict(zip(names, map(_json_value, row))), ensure_ascii=False) for row in rows]
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def write_csv(chunks, names):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for rows in chunks:
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what pyarrow wrote since the last drain"""
+
+    def __init__(self):
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _arrow_schema(columns):
+    types = {
+        db.Integer: pa.int64(), db.Boolean: pa.bool_(), db.DateTime: pa.timestamp('us'),
+        db.String: pa.string(), db.Text: pa.string()
+    }
+    return pa.schema([
+        pa.field(column.key, next(t for base, t in types.items() if isinstance(column.type, base)),
+                 nullable=column.nullable)
+        for column in columns
+    ])
+
+
+def _write_arrow_file(chunks, columns, open_writer):
+    schema = _arrow_schema(columns)
+    sink = _ChunkSink()
+    writer = open_writer(sink, schema)
+    for rows in chunks:
+        # One Parquet row group / Arrow record batch per chunk
+        writer.write_batch(pa.record_batch([list(values) for values in zip(*rows)], schema=schema))
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+def write_parquet(chunks, columns):
+    return _write_arrow_file(chunks, columns, lambda sink, schema: pq.ParquetWriter(sink, schema))
+
+
+def write_arrow(chunks, columns):
+    return _write_arrow_file(chunks, columns, pa.ipc.new_stream)
+
+
+def gzip_stream(chunks, level=GZIP_LEVEL):
+    """Gzip-compress a stream of bytes chunk by chunk"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_filename(name, fmt, compress=False, now=None):
+    stamp = (now or datetime.utcnow()).strftime('%Y%m%d-%H%M%S')
+    return f"{name}-{stamp}.{EXTENSIONS[fmt]}{'.gz' if compress else ''}"
+
+
+def export_stream(name, fmt, filters=None, compress=False, chunk_size=CHUNK_SIZE):
+    """
+    Iterator of bytes with every `name` row matching the listing `filters`
+
+    The arguments and filters are checked up front, raising ExportError or
+    PaginationError, so callers can report bad input before streaming
+    starts. Rows come out in id order. Must be consumed inside an
+    application context.
+    """
+    if name not in EXPORTS:
+        raise ExportError(f"Unknown export '{name}'")
+    if fmt in ('parquet', 'arrow') and pa is None:
+        raise ExportError(f"{fmt} export needs pyarrow, which is not installed")
+    if fmt not in EXTENSIONS:
+        raise ExportError(f"format must be one of {', '.join(EXTENSIONS)}")
+
+    build, columns = EXPORTS[name]
+    query = build(filters or {}).with_entities(*columns).order_by(columns[0])
+    chunks = iter_chunks(query, chunk_size)
+    if fmt == 'ndjson':
+        stream = write_ndjson(chunks, [column.key for column in columns])
+    elif fmt == 'csv':
+        stream = write_csv(chunks, [column.key for column in columns])
+    elif fmt == 'parquet':
+        stream = write_parquet(chunks, columns)
+    else:
+        stream = write_arrow(chunks, columns)
+    return gzip_stream(stream) if compress else stream
@@ -0,0 +1,150 @@
+import os
+import io
+import hashlib
+import logging
+import threading
+from PIL import Image as PILImage
+
+logger = logging.getLogger(__name__)
+
+# Derivatives are rendered at twice the display size (144 dpi) so they stay
+# sharp when the PDF is zoomed or printed
+DEFAULT_SCALE = 2.0
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'pdf_images')
+
+
+def fit_to_box(width, height, max_width, max_height):
+    """Calculate new dimensions maintaining aspect ratio"""
+    aspect_ratio = width / height
+
+    if width > height:
+        new_width = min(max_width, width)
+        new_height = new_width / aspect_ratio
+        if new_height > max_height:
+            new_height = max_height
+            new_width = new_height * aspect_ratio
+    else:
+        new_height = min(max_height, height)
+        new_width = new_height * aspect_ratio
+        if new_width > max_width:
+            new_width = max_width
+            new_height = new_width / aspect_ratio
+
+    return new_width, new_height
+
+
+class ImageDerivative:
+    """A source image pre-sized for a target box"""
+
+    __slots__ = ('path', 'data', 'width', 'height')
+
+    def __init__(self, width, height, path=None, data=None):
+        self.width = width
+        self.height = height
+        self.path = path
+        self.data = data
+
+    def source(self):
+        """Return something ReportLab's Image flowable can read"""
+        if self.path is not None:
+            return self.path
+        return io.BytesIO(self.data)
+
+
+class ImageDerivativeCache:
+    """
+    Cache of images already resized to the box they are drawn in
+
+    Derivatives are stored as JPEG (PNG when the source has transparency),
+    which ReportLab embeds without decoding. Entries are keyed on the source
+    path, its mtime and the target box, and kept both in memory and on disk
+    so other worker processes and later deploys can reuse them. When the
+    cache directory is not writable (e.g. a read-only serverless bundle) the
+    encoded bytes are kept in memory instead.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, scale=DEFAULT_SCALE, jpeg_quality=85):
+        self.cache_dir = cache_dir
+        self.scale = scale
+        self.jpeg_quality = jpeg_quality
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _key(self, image_path, mtime, max_width, max_height):
+        raw = f"{os.path.abspath(image_path)}|{mtime}|{max_width:.2f}|{max_height:.2f}|{self.scale}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, image_path, max_width, max_height):
+        """
+        Return an ImageDerivative for image_path fitted to the given box
+
+        Raises OSError if the source image cannot be read.
+        """
+        mtime = os.stat(image_path).st_mtime_ns
+        key = self._key(image_path, mtime, max_width, max_height)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load_from_disk(key, image_path, max_width, max_height)
+            if entry is None:
+                entry = self._build(key, image_path, max_width, max_height)
+            self._entries[key] = entry
+        return entry
+
+    def _load_from_disk(self, key, image_path, max_width, max_height):
+        for extension in ('jpg', 'png'):
+            path = os.path.join(self.cache_dir, f"{key}.{extension}")
+            if os.path.exists(path):
+                # Opening only reads the header, the pixels are never decoded
+                with PILImage.open(image_path) as source:
+                    width, height = source.size
+                draw_width, draw_height = fit_to_box(width, height, max_width, max_height)
+                return ImageDerivative(draw_width, draw_height, path=path)
+        return None
+
+    def _build(self, key, image_path, max_width, max_height):
+        with PILImage.open(image_path) as source:
+            draw_width, draw_height = fit_to_box(source.width, source.height, max_width, max_height)
+
+            # Never upscale, only shrink to the pixels the box can show
+            pixel_width = min(source.width, max(1, round(draw_width * self.scale)))
+            pixel_height = min(source.height, max(1, round(draw_height * self.scale)))
+
+            has_alpha = source.mode in ('RGBA', 'LA', 'PA') or 'transparency' in source.info
+            resized = source.convert('RGBA' if has_alpha else 'RGB')
+            if (pixel_width, pixel_height) != resized.size:
+                resized = resized.resize((pixel_width, pixel_height), PILImage.LANCZOS)
+
+        extension = 'png' if has_alpha else 'jpg'
+        buffer = io.BytesIO()
+        if has_alpha:
+            resized.save(buffer, format='PNG', optimize=True)
+        else:
+            resized.save(buffer, format='JPEG', quality=self.jpeg_quality, optimize=True)
+        data = buffer.getvalue()
+
+        path = os.path.join(self.cache_dir, f"{key}.{extension}")
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename so concurrent workers never see partial files
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            return ImageDerivative(draw_width, draw_height, path=path)
+        except OSError as e:
+            logger.warning(f"Image cache directory not writable, keeping {image_path} in memory: {str(e)}")
+            return ImageDerivative(draw_width, draw_height, data=data)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide cache used by the PDF generators
+image_cache = ImageDerivativeCache(cache_dir=os.environ.get('PDF_IMAGE_CACHE_DIR', DEFAULT_CACHE_DIR))
@@ -0,0 +1,184 @@
+"""
+Versioned schema migrations
+
+Tables that do not exist yet are created from models.py by db.create_all(),
+which also creates the indexes declared on them. Existing databases are
+brought up to date by the numbered migrations below. Each one runs once, in
+order, in its own transaction and is recorded in schema_migrations. The SQL
+is kept portable so the same statements run on SQLite and PostgreSQL.
+"""
+from datetime import datetime
+from sqlalchemy import text, inspect
+from app import app, db
+from admin_queries import LISTINGS
+from pagination import keyset_query, encode_cursor
+from stats import rebuild
+
+
+def add_column(table, column, ddl):
+    """Migration step adding a column, unless db.create_all() already created it"""
+    def step(conn):
+        if column not in {existing['name'] for existing in inspect(conn).get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+
+# (version, description, steps); a step is a SQL statement or a function of
+# the connection. Append new migrations, never edit applied ones
+MIGRATIONS = [
+    (1, 'Indexes for the admin listings and email lookups', [
+        "CREATE INDEX IF NOT EXISTS ix_contacts_created_at_id ON contacts (created_at DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS ix_contacts_is_read_created_at_id "
+        "ON contacts (is_read, created_at DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS ix_contacts_email ON contacts (email)",
+        "CREATE INDEX IF NOT EXISTS ix_newsletter_subscribed_at_id "
+        "ON newsletter_subscriptions (subscribed_at DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS ix_newsletter_is_active_subscribed_at_id "
+        "ON newsletter_subscriptions (is_active, subscribed_at DESC, id DESC)",
+    ]),
+    (2, 'Archive flag for contact triage', [
+        add_column('contacts', 'is_archived', 'BOOLEAN NOT NULL DEFAULT false'),
+    ]),
+    (3, 'Seed the admin statistics from existing rows', [
+        rebuild,
+    ]),
+    (4, 'Record which admin digest reported each contact', [
+        add_column('contacts', 'digest_id', 'INTEGER REFERENCES admin_digests (id)'),
+        "CREATE INDEX IF NOT EXISTS ix_contacts_digest_id ON contacts (digest_id)",
+        # Contacts in earlier digests' id ranges were reported already
+        "UPDATE contacts SET digest_id = (SELECT d.id FROM admin_digests d "
+        "WHERE contacts.id > d.after_contact_id AND contacts.id <= d.last_contact_id) "
+        "WHERE digest_id IS NULL",
+    ]),
+    (5, 'Count the recipients a broadcast skipped', [
+        add_column('newsletter_broadcasts', 'rejected_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ]),
+]
+
+CREATE_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    description VARCHAR(200) NOT NULL,
+    applied_at TIMESTAMP NOT NULL
+)
+"""
+
+
+def applied_versions():
+    with db.engine.begin() as conn:
+        conn.execute(text(CREATE_MIGRATIONS_TABLE))
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def upgrade():
+    """
+    Create missing tables and apply pending migrations
+
+    Returns the list of versions applied by this call. Must be called
+    inside an application context.
+    """
+    db.create_all()
+    done = applied_versions()
+    applied = []
+    for version, description, steps in MIGRATIONS:
+        if version in done:
+            continue
+        with db.engine.begin() as conn:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(text(step))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) "
+                     "VALUES (:version, :description, :applied_at)"),
+                {'version': version, 'description': description, 'applied_at': datetime.utcnow()}
+            )
+        app.logger.info(f"Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
+
+
+def status():
+    """(version, description, applied) for every known migration"""
+    done = applied_versions()
+    return [(version, description, version in done) for version, description, _ in MIGRATIONS]
+
+
+def explain(query):
+    """The database's query plan for a SQLAlchemy ORM query, as a list of lines"""
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+
+    with db.engine.connect() as conn:
+        if db.engine.dialect.name == 'sqlite':
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+            return [row[-1] for row in rows]
+        with conn.begin():
+            # On small tables the planner rightly prefers a sequential scan;
+            # the check is whether an index can serve the query at all
+            conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            rows = conn.exec_driver_sql(f"EXPLAIN {compiled}", params)
+            return [row[0] for row in rows]
+
+
+def plan_uses_index(plan_lines, index_names, allow_sort=False):
+    """
+    True when the plan reads through one of `index_names` (or any index if
+    none are given) without a full table scan, and without a separate sort
+    step unless `allow_sort`
+    """
+    steps = [line.strip().lstrip('->').strip() for line in plan_lines]
+    if db.engine.dialect.name == 'sqlite':
+        if any(step.startswith('SCAN') and 'INDEX' not in step for step in steps):
+            return False
+        if not allow_sort and any('TEMP B-TREE FOR ORDER BY' in step for step in steps):
+            return False
+        used = [step for step in steps if 'USING INDEX' in step or 'USING COVERING INDEX' in step]
+    else:
+        if any(step.startswith('Seq Scan') for step in steps):
+            return False
+        if not allow_sort and any(step.startswith(('Sort', 'Incremental Sort')) for step in steps):
+            return False
+        used = [step for step in steps if 'Index' in step and ' on ' in step]
+    if not used:
+        return False
+    return not index_names or any(name in step for step in used for name in index_names)
+
+
+_SAMPLE_CURSOR = encode_cursor(datetime(2024, 6, 1), 1000)
+
+# (listing, filters, indexes that should serve it, whether a sort step is acceptable)
+INDEX_CHECKS = [
+    ('contacts', {}, ['ix_contacts_created_at_id'], False),
+    ('contacts', {'cursor': _SAMPLE_CURSOR}, ['ix_contacts_created_at_id'], False),
+    ('contacts', {'is_read': 'false'}, ['ix_contacts_is_read_created_at_id'], False),
+    ('contacts', {'is_read': 'false', 'cursor': _SAMPLE_CURSOR}, ['ix_contacts_is_read_created_at_id'], False),
+    ('contacts', {'since': '2024-01-01', 'until': '2024-02-01'}, ['ix_contacts_created_at_id'], False),
+    # Matching rows are found through the email index and then sorted
+    ('contacts', {'email_prefix': 'jane'}, ['ix_contacts_email'], True),
+    ('newsletters', {}, ['ix_newsletter_subscribed_at_id'], False),
+    ('newsletters', {'is_active': 'true'}, ['ix_newsletter_is_active_subscribed_at_id'], False),
+    ('newsletters', {'email_prefix': 'jane'}, [], True),
+]
+
+
+def check_indexes():
+    """
+    EXPLAIN the admin listing queries and check each one uses its index
+
+    Returns a list of (description, ok, plan lines).
+    """
+    results = []
+    for listing, filters, index_names, allow_sort in INDEX_CHECKS:
+        build, sort_column, id_column = LISTINGS[listing]
+        query = keyset_query(build(filters), sort_column, id_column, filters.get('cursor'))
+        plan = explain(query)
+        description = f"{listing} {', '.join(f'{k}={v}' for k, v in filters.items() if k != 'cursor')}".strip()
+        if 'cursor' in filters:
+            description += ' (next page)'
+        results.append((description, plan_uses_index(plan, index_names, allow_sort), plan))
+    return results
@@ -16,6 +16,18 @@ class Contact(db.Model):
     company = db.Column(db.String(100), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     is_read = db.Column(db.Boolean, default=False, nullable=False)
+    is_archived = db.Column(db.Boolean, default=False, server_default=db.false(), nullable=False)
+    # Admin digest that reported this contact, set when the digest claims it
+    digest_id = db.Column(db.Integer, db.ForeignKey('admin_digests.id'), nullable=True)
+    
+    # Match the admin listing (newest first, optionally unread only) and
+    # email lookups; existing databases get them from migrations.py
+    __table_args__ = (
+        db.Index('ix_contacts_created_at_id', created_at.desc(), id.desc()),
+        db.Index('ix_contacts_is_read_created_at_id', is_read, created_at.desc(), id.desc()),
+        db.Index('ix_contacts_email', email),
+        db.Index('ix_contacts_digest_id', digest_id),
+    )
     
     def __repr__(self):
         return f'<Contact {self.name} - {self.email}>'
@@ -31,7 +43,8 @@ class Contact(db.Model):
             'phone': self.phone,
             'company': self.company,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'is_read': self.is_read
+            'is_read': self.is_read,
+            'is_archived': self.is_archived
         }
 
 class Newsletter(db.Model):
@@ -44,6 +57,13 @@ class Newsletter(db.Model):
     subscribed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     
+    # Match the admin listing (newest first, optionally active only); email
+    # lookups use the unique index on email
+    __table_args__ = (
+        db.Index('ix_newsletter_subscribed_at_id', subscribed_at.desc(), id.desc()),
+        db.Index('ix_newsletter_is_active_subscribed_at_id', is_active, subscribed_at.desc(), id.desc()),
+    )
+    
     def __repr__(self):
         return f'<Newsletter {self.email}>'
     
@@ -55,3 +75,149 @@ class Newsletter(db.Model):
             'subscribed_at': self.subscribed_at.isoformat() if self.subscribed_at else None,
             'is_active': self.is_active
         }
+
+class EmailOutbox(db.Model):
+    """Outgoing email waiting to be delivered by the outbox worker"""
+    
+    __tablename__ = 'email_outbox'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    contact_id = db.Column(db.Integer, db.ForeignKey('contacts.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+    
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} {self.kind} {self.status}>'
+    
+    def to_dict(self):
+        """Convert outbox entry to dictionary"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'contact_id': self.contact_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
+
+class NewsletterBroadcast(db.Model):
+    """Newsletter send to every active subscriber, checkpointed per batch"""
+    
+    __tablename__ = 'newsletter_broadcasts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(200), nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    text = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), default='pending', nullable=False)
+    last_subscriber_id = db.Column(db.Integer, default=0, nullable=False)
+    sent_count = db.Column(db.Integer, default=0, nullable=False)
+    batch_count = db.Column(db.Integer, default=0, nullable=False)
+    rejected_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<NewsletterBroadcast {self.id} {self.status}>'
+    
+    def to_dict(self):
+        """Convert broadcast to dictionary"""
+        return {
+            'id': self.id,
+            'subject': self.subject,
+            'status': self.status,
+            'last_subscriber_id': self.last_subscriber_id,
+            'sent_count': self.sent_count,
+            'batch_count': self.batch_count,
+            'rejected_count': self.rejected_count,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class BroadcastRejection(db.Model):
+    """Subscriber the email API refused for one broadcast (skipped, not retried)"""
+    
+    __tablename__ = 'newsletter_broadcast_rejections'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    broadcast_id = db.Column(db.Integer, db.ForeignKey('newsletter_broadcasts.id'), nullable=False, index=True)
+    subscriber_id = db.Column(db.Integer, nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<BroadcastRejection {self.broadcast_id} {self.email}>'
+
+class AdminDigest(db.Model):
+    """Admin summary of the contacts submitted during one digest window"""
+    
+    __tablename__ = 'admin_digests'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # The contacts in this digest are the ones with contacts.digest_id = id.
+    # after_contact_id and last_contact_id are informational: the span of
+    # their ids (lowest - 1, highest), which can overlap another digest's
+    # when a contact with a lower id commits late
+    after_contact_id = db.Column(db.Integer, unique=True, nullable=False)
+    last_contact_id = db.Column(db.Integer, nullable=False)
+    contact_count = db.Column(db.Integer, default=0, nullable=False)
+    priority_count = db.Column(db.Integer, default=0, nullable=False)
+    window_start = db.Column(db.DateTime, nullable=True)
+    window_end = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<AdminDigest {self.id} {self.contact_count} contacts>'
+    
+    def to_dict(self):
+        """Convert digest to dictionary"""
+        return {
+            'id': self.id,
+            'after_contact_id': self.after_contact_id,
+            'last_contact_id': self.last_contact_id,
+            'contact_count': self.contact_count,
+            'priority_count': self.priority_count,
+            'window_start': self.window_start.isoformat() if self.window_start else None,
+            'window_end': self.window_end.isoformat() if self.window_end else None
+        }
+
+class StatCounter(db.Model):
+    """Running total for the admin statistics, kept up to date by the write paths"""
+    
+    __tablename__ = 'stat_counters'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<StatCounter {self.name}={self.value}>'
+
+class DailyStat(db.Model):
+    """Per-day rollup of one admin statistic (UTC days)"""
+    
+    __tablename__ = 'daily_stats'
+    
+    day = db.Column(db.Date, primary_key=True)
+    metric = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<DailyStat {self.day} {self.metric}={self.count}>'
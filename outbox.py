@@ -0,0 +1,240 @@
+import os
+import json
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from app import app, db
+from models import EmailOutbox
+from email_service import send_contact_email, send_auto_reply_email, send_admin_digest_email
+from circuit_breaker import email_breaker, OPEN
+
+MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 8))
+BACKOFF_SECONDS = int(os.environ.get('OUTBOX_BACKOFF_SECONDS', 30))
+MAX_BACKOFF_SECONDS = int(os.environ.get('OUTBOX_MAX_BACKOFF_SECONDS', 3600))
+POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', 5))
+BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 20))
+
+# Rows stuck in 'sending' longer than this belong to a worker that died
+LOCK_TIMEOUT = timedelta(minutes=5)
+
+
+def local_time(value):
+    """A naive UTC datetime, as the database stores them, in local time"""
+    return value.replace(tzinfo=timezone.utc).astimezone()
+
+
+def _submitted_at(payload):
+    """The submission time stored with the email, in local time like the templates expect"""
+    submitted_at = payload.get('submitted_at')
+    if submitted_at is None:
+        # Queued before the time was stored
+        return None
+    return datetime.fromisoformat(submitted_at).astimezone()
+
+
+def _send_contact_notification(payload):
+    return send_contact_email(payload['contact'], payload['admin_email'], _submitted_at(payload))
+
+
+def _send_auto_reply(payload):
+    return send_auto_reply_email(payload['contact'], _submitted_at(payload))
+
+
+def _send_admin_digest(payload):
+    return send_admin_digest_email(payload['digest'], payload['admin_email'])
+
+
+# Outbox kind -> function(payload) returning (success, result)
+SENDERS = {
+    'contact_notification': _send_contact_notification,
+    'auto_reply': _send_auto_reply,
+    'admin_digest': _send_admin_digest,
+}
+
+
+def enqueue_email(kind, payload, contact_id=None):
+    """
+    Add an email to the outbox in the current session
+
+    The caller commits, so the email is stored in the same transaction as
+    the row it belongs to.
+    """
+    if kind not in SENDERS:
+        raise ValueError(f"Unknown outbox email kind: {kind}")
+
+    entry = EmailOutbox(kind=kind, payload=json.dumps(payload), contact_id=contact_id)
+    db.session.add(entry)
+    return entry
+
+
+def enqueue_contact_emails(contact_id, contact_data, admin_email, notify_admin=True, submitted_at=None):
+    """
+    Queue the auto-reply for a contact submission, and the admin notification
+    unless the admin gets this contact in a digest instead
+
+    submitted_at (naive UTC, like Contact.created_at; defaults to now) is
+    stored with the emails, so a retried or delayed send still shows when
+    the form was submitted rather than when the email went out.
+    """
+    submitted_at = (submitted_at or datetime.utcnow()).replace(tzinfo=timezone.utc).isoformat()
+    if notify_admin:
+        enqueue_email('contact_notification', {
+            'contact': contact_data, 'admin_email': admin_email, 'submitted_at': submitted_at
+        }, contact_id)
+    enqueue_email('auto_reply', {'contact': contact_data, 'submitted_at': submitted_at}, contact_id)
+
+
+def backoff_delay(attempts):
+    """Exponential backoff with jitter for the given number of failed attempts"""
+    delay = min(BACKOFF_SECONDS * (2 ** (attempts - 1)), MAX_BACKOFF_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _claim(entry_id, now):
+    """Atomically move a pending row to 'sending' so only one worker sends it"""
+    claimed = EmailOutbox.query.filter(
+        EmailOutbox.id == entry_id,
+        EmailOutbox.status == 'pending'
+    ).update({'status': 'sending', 'locked_at': now}, synchronize_session=False)
+    db.session.commit()
+    return claimed == 1
+
+
+def _release_stale_locks(now):
+    EmailOutbox.query.filter(
+        EmailOutbox.status == 'sending',
+        EmailOutbox.locked_at < now - LOCK_TIMEOUT
+    ).update({'status': 'pending', 'locked_at': None}, synchronize_session=False)
+    db.session.commit()
+
+
+def deliver(entry):
+    """Send one claimed outbox entry and record the outcome"""
+    try:
+        success, result = SENDERS[entry.kind](json.loads(entry.payload))
+    except Exception as e:
+        success, result = False, str(e)
+
+    entry.attempts += 1
+    entry.locked_at = None
+    if success:
+        entry.status = 'sent'
+        entry.sent_at = datetime.utcnow()
+        entry.last_error = None
+    else:
+        entry.last_error = str(result)[:2000]
+        if entry.attempts >= MAX_ATTEMPTS:
+            entry.status = 'failed'
+            app.logger.error(f"Outbox email {entry.id} ({entry.kind}) failed permanently: {result}")
+        else:
+            entry.status = 'pending'
+            entry.next_attempt_at = datetime.utcnow() + backoff_delay(entry.attempts)
+            app.logger.warning(f"Outbox email {entry.id} ({entry.kind}) failed, retry {entry.attempts}: {result}")
+    db.session.commit()
+    return success
+
+
+def drain_outbox(batch_size=BATCH_SIZE):
+    """
+    Deliver due outbox entries
+
+    Returns a dict with the number of entries sent and failed. Nothing is
+    claimed while the email circuit is open, so an outage does not use up
+    retry attempts. Must be called inside an application context.
+    """
+    if email_breaker.state == OPEN:
+        return {'sent': 0, 'failed': 0}
+
+    now = datetime.utcnow()
+    _release_stale_locks(now)
+
+    due_ids = [row.id for row in db.session.query(EmailOutbox.id).filter(
+        EmailOutbox.status == 'pending',
+        EmailOutbox.next_attempt_at <= now
+    ).order_by(EmailOutbox.id).limit(batch_size)]
+
+    sent = failed = 0
+    for entry_id in due_ids:
+        if email_breaker.state == OPEN:
+            break
+        if not _claim(entry_id, now):
+            continue  # another worker took it
+        entry = db.session.get(EmailOutbox, entry_id)
+        if deliver(entry):
+            sent += 1
+        else:
+            failed += 1
+    return {'sent': sent, 'failed': failed}
+
+
+def outbox_stats():
+    """Count outbox entries by status"""
+    rows = db.session.query(EmailOutbox.status, db.func.count(EmailOutbox.id)).group_by(EmailOutbox.status)
+    return {status: count for status, count in rows}
+
+
+class OutboxWorker:
+    """
+    Background thread that drains the outbox every POLL_INTERVAL seconds
+
+    Other modules can register periodic tasks with add_task(); they run in
+    the same application context before each drain.
+    """
+
+    def __init__(self, poll_interval=POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._tasks = []
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='outbox-worker', daemon=True)
+                self._thread.start()
+
+    def add_task(self, task):
+        self._tasks.append(task)
+
+    def wake(self):
+        """Drain now instead of waiting for the next poll"""
+        self.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                with app.app_context():
+                    for task in self._tasks:
+                        try:
+                            task()
+                        except Exception as e:
+                            db.session.rollback()
+                            app.logger.error(f"Outbox worker task {task.__name__} failed: {str(e)}")
+                    # Keep going while full batches come back
+                    while True:
+                        result = drain_outbox()
+                        if result['sent'] + result['failed'] < BATCH_SIZE:
+                            break
+            except Exception as e:
+                app.logger.error(f"Outbox worker error: {str(e)}")
+
+
+def outbox_enabled():
+    """OUTBOX_ENABLED=0 sends email during the request instead"""
+    return os.environ.get('OUTBOX_ENABLED', '1') != '0'
+
+
+outbox_worker = OutboxWorker()
+
+
+@app.before_request
+def start_outbox_worker():
+    """Start the worker in each server process on its first request"""
+    if outbox_enabled():
+        outbox_worker.start()
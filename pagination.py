@@ -0,0 +1,102 @@
+import sys
+import json
+import base64
+from datetime import datetime
+from app import db
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PaginationError(ValueError):
+    """A query parameter for a paginated listing is invalid"""
+
+
+def encode_cursor(sort_value, row_id):
+    raw = json.dumps([sort_value.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, TypeError):
+        raise PaginationError('Invalid cursor')
+
+
+def parse_page_size(value):
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        raise PaginationError('limit must be a number')
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def parse_bool(value, name):
+    if value in (None, ''):
+        return None
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise PaginationError(f"{name} must be true or false")
+
+
+def parse_datetime(value, name):
+    if value in (None, ''):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise PaginationError(f"{name} must be an ISO date or datetime")
+
+
+def prefix_range(column, prefix):
+    """
+    `column` starts with `prefix`, as a range condition
+
+    Unlike LIKE 'prefix%', a range is served by a plain b-tree index on
+    every backend and collation. Emails are stored lower-cased, so the
+    prefix is lower-cased too.
+    """
+    prefix = prefix.lower()
+    # Nothing sorts after U+10FFFF, so bump the last character before it;
+    # a prefix of only U+10FFFF has no upper bound
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return column >= prefix
+    following = ord(stem[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        # Surrogates can't be encoded for the database
+        following = 0xE000
+    return db.and_(column >= prefix, column < stem[:-1] + chr(following))
+
+
+def keyset_query(query, sort_column, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """`query` ordered newest first and limited to one page plus one row"""
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.filter(db.tuple_(sort_column, id_column) < (sort_value, row_id))
+    return query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def keyset_page(query, sort_column, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of `query`, newest first, using keyset pagination
+
+    Rows are ordered by (sort_column, id_column) descending and the cursor
+    is the position of the last row returned, so every page is a range
+    scan on the matching composite index, however deep it is. Returns
+    (rows, next_cursor); next_cursor is None on the last page.
+    """
+    rows = keyset_query(query, sort_column, id_column, cursor, limit).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
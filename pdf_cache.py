@@ -0,0 +1,204 @@
+import os
+import io
+import json
+import hashlib
+import logging
+import threading
+from datetime import date
+from collections import OrderedDict
+from flask import Response, request
+
+logger = logging.getLogger(__name__)
+
+# Size of the pieces PDFs are streamed to the client in
+STREAM_CHUNK_SIZE = int(os.environ.get('PDF_STREAM_CHUNK_SIZE', 64 * 1024))
+
+
+class CachedPDF:
+    """A rendered PDF held in the cache"""
+
+    __slots__ = ('key', 'data', 'etag')
+
+    def __init__(self, key, data):
+        self.key = key
+        self.data = data
+        # ReportLab embeds a timestamp and a random document ID, so the
+        # bytes differ per render; the cache key is what every worker and
+        # every re-render agree on
+        self.etag = key
+
+    @property
+    def size(self):
+        return len(self.data)
+
+    def open(self):
+        return io.BytesIO(self.data)
+
+
+class StreamedPDF:
+    """A rendered PDF too large to cache, served straight from its file"""
+
+    __slots__ = ('fileobj', 'size', 'etag')
+
+    def __init__(self, fileobj, size, etag):
+        self.fileobj = fileobj
+        self.size = size
+        self.etag = etag
+
+    def open(self):
+        return self.fileobj
+
+
+class PDFCache:
+    """
+    Content-addressed LRU cache for generated portfolio PDFs
+
+    Entries are keyed on the portfolio data plus the modification times of
+    the images embedded in the document, so replacing an image on disk
+    invalidates every PDF that uses it. The total size of cached bytes is
+    bounded by max_bytes; least recently used entries are evicted first.
+    PDFs larger than max_entry_bytes are never loaded into memory and are
+    streamed from the file they were rendered to instead.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_entry_bytes=4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(portfolio_data, image_paths=()):
+        """Hash portfolio data and image mtimes into a cache key"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(portfolio_data, sort_keys=True, default=str).encode('utf-8'))
+        # The page footer prints the generation date
+        digest.update(date.today().isoformat().encode('ascii'))
+        for path in image_paths:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                # Missing images render as placeholders
+                mtime = None
+            digest.update(f"\0{path}\0{mtime}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, data):
+        entry = CachedPDF(key, data)
+        if entry.size > self.max_entry_bytes:
+            # Too large to cache, serve it without keeping a copy
+            return entry
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+        return entry
+
+    def get_or_render(self, generator_cls, portfolio_data, render=None):
+        """
+        Return the cached PDF for portfolio_data, rendering it on a miss
+
+        render(generator_cls, portfolio_data) must return a readable file
+        positioned at the start of the PDF; by default the generator runs in
+        the calling thread. Results over max_entry_bytes come back as a
+        StreamedPDF that owns that file.
+        """
+        key = self.make_key(portfolio_data, getattr(generator_cls, 'image_paths', ()))
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+
+        render = render or render_in_process
+        fileobj = render(generator_cls, portfolio_data)
+        size = fileobj.seek(0, io.SEEK_END)
+        fileobj.seek(0)
+        logger.info(f"Rendered portfolio PDF {key[:12]} ({size} bytes)")
+
+        if size <= self.max_entry_bytes:
+            with fileobj:
+                return self.put(key, fileobj.read())
+
+        return StreamedPDF(fileobj, size, key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+def render_in_process(generator_cls, portfolio_data):
+    """Render a portfolio PDF in the calling thread"""
+    return generator_cls().generate_portfolio_pdf(portfolio_data)
+
+
+# Process-wide cache shared by all request handlers
+pdf_cache = PDFCache(
+    max_bytes=int(os.environ.get('PDF_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+    max_entry_bytes=int(os.environ.get('PDF_CACHE_MAX_ENTRY_BYTES', 4 * 1024 * 1024))
+)
+
+
+def stream_pdf(fileobj, size, download_name, etag=None, weak=False, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Stream a PDF file to the client in fixed-size chunks
+
+    Only one chunk is held in memory at a time. The file is closed when the
+    response finishes, including when a conditional request short-circuits
+    it to 304.
+    """
+    def generate():
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    response = Response(generate(), mimetype='application/pdf', direct_passthrough=True)
+    response.call_on_close(fileobj.close)
+    response.content_length = size
+    response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    response.cache_control.no_cache = True
+    if etag:
+        response.set_etag(etag, weak=weak)
+    return response.make_conditional(request)
+
+
+def send_cached_pdf(generator_cls, portfolio_data, download_name, cache=pdf_cache, render=None):
+    """
+    Serve a portfolio PDF from the cache
+
+    The response carries the cache key as a weak ETag (renders of the same
+    key are equivalent, not byte-identical), so an If-None-Match from any
+    worker or after an eviction is answered with 304 Not Modified.
+    """
+    entry = cache.get_or_render(generator_cls, portfolio_data, render=render)
+    return stream_pdf(entry.open(), entry.size, download_name, etag=entry.etag, weak=True)
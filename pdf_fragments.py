@@ -0,0 +1,81 @@
+import os
+import copy
+import threading
+from collections import OrderedDict
+
+
+def freeze(value):
+    """Turn lists and dicts from portfolio data into hashable tuples"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def file_state(paths):
+    """Key component that changes whenever one of the files changes"""
+    state = []
+    for path in paths:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        state.append((path, mtime))
+    return tuple(state)
+
+
+class FragmentCache:
+    """
+    LRU cache of the flowables that make up one section of a PDF
+
+    Sections are keyed by their name and the inputs they are built from, so
+    a render where only the title changes reuses the meta table, image rows
+    and feature paragraphs of an earlier render. Flowables keep layout state
+    from wrap() and split(), so every caller gets shallow copies of the
+    cached flowables; the parsed text, styles and image data are shared.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, section, key, build):
+        """Return copies of the flowables build() produced for (section, key)"""
+        cache_key = (section, key)
+        with self._lock:
+            flowables = self._entries.get(cache_key)
+            if flowables is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if flowables is None:
+            flowables = tuple(build())
+            with self._lock:
+                self._entries[cache_key] = flowables
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return [copy.copy(flowable) for flowable in flowables]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Process-wide cache shared by both PDF generators
+fragment_cache = FragmentCache(max_entries=int(os.environ.get('PDF_FRAGMENT_CACHE_SIZE', 256)))
@@ -1,67 +1,72 @@
 
 import os
 import io
+import tempfile
+import logging
 from datetime import datetime
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 from PIL import Image as PILImage
+from pdf_styles import get_style_registry
+from image_cache import image_cache
+from pdf_fragments import fragment_cache, freeze, file_state
 import requests
-from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# Generated PDFs larger than this spill from memory to a temporary file
+SPOOL_MAX_MEMORY = int(os.environ.get('PDF_SPOOL_MAX_MEMORY', 1024 * 1024))
+
+# Portfolio screenshots embedded in every generated PDF
+MAIN_IMAGES = (
+    'static/img/portfolio/portfolio-5.webp',
+    'static/img/portfolio/portfolio-7.webp',
+    'static/img/portfolio/portfolio-8.webp'
+)
+
+GALLERY_IMAGES = (
+    'static/img/portfolio/portfolio-4.webp',
+    'static/img/portfolio/portfolio-6.webp',
+    'static/img/portfolio/portfolio-11.webp',
+    'static/img/portfolio/portfolio-12.webp'
+)
+
+DEFAULT_PORTFOLIO_DATA = {
+    'project_type': 'UX/UI Design',
+    'date': 'September 2024',
+    'client': 'DigitalCraft Solutions',
+    'website': 'projectwebsite.example.com',
+    'title': 'Innovative Financial Dashboard App',
+    'overview': 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. Maecenas varius tortor nibh, sit amet tempor nibh finibus et. Aenean eu enim justo. Vestibulum aliquam hendrerit molestie.',
+    'challenge': 'Mauris blandit aliquet elit, eget tincidunt nibh pulvinar a. Vivamus suscipit tortor eget felis porttitor volutpat.',
+    'solution': 'Donec sollicitudin molestie malesuada. Curabitur arcu erat, accumsan id imperdiet et, porttitor at sem.',
+    'features': [
+        'Real-time Data Visualization',
+        'User Role Management',
+        'Secure Authentication',
+        'Customizable Dashboards',
+        'Data Export Options',
+        'Multi-device Support'
+    ],
+    'tech_stack': ['Angular', 'Express.js', 'PostgreSQL', 'GraphQL', 'Firebase']
+}
 
 class PortfolioPDFGenerator:
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self.custom_styles = self._create_custom_styles()
-        
-    def _create_custom_styles(self):
-        """Create custom paragraph styles"""
-        styles = {}
-        
-        # Title style
-        styles['CustomTitle'] = ParagraphStyle(
-            'CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.HexColor('#2c5aa0')
-        )
-        
-        # Subtitle style
-        styles['CustomSubtitle'] = ParagraphStyle(
-            'CustomSubtitle',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            spaceAfter=20,
-            alignment=TA_LEFT,
-            textColor=colors.HexColor('#1f4788')
-        )
-        
-        # Body style
-        styles['CustomBody'] = ParagraphStyle(
-            'CustomBody',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            spaceAfter=12,
-            alignment=TA_JUSTIFY,
-            leading=14
-        )
-        
-        # Feature list style
-        styles['FeatureList'] = ParagraphStyle(
-            'FeatureList',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            spaceAfter=8,
-            leftIndent=20,
-            bulletIndent=10
-        )
-        
-        return styles
+    # Image files whose modification time affects the rendered output
+    image_paths = MAIN_IMAGES + GALLERY_IMAGES
+
+    def __init__(self, main_images=MAIN_IMAGES, gallery_images=GALLERY_IMAGES):
+        self.main_images = tuple(main_images)
+        self.gallery_images = tuple(gallery_images)
+        self.image_paths = self.main_images + self.gallery_images
+        
+        # Styles are built once per process and shared between generators
+        registry = get_style_registry()
+        self.colors = registry.colors
+        self.custom_styles = registry.paragraph_styles
+        self.table_styles = registry.table_styles
     
     def _add_header_footer(self, canvas, doc):
         """Add header and footer to each page"""
@@ -69,12 +74,12 @@ class PortfolioPDFGenerator:
         
         # Header
         canvas.setFont('Helvetica-Bold', 12)
-        canvas.setFillColor(colors.HexColor('#2c5aa0'))
+        canvas.setFillColor(self.colors['primary'])
         canvas.drawString(50, letter[1] - 50, "BizzPulse Portfolio")
         
         # Footer
         canvas.setFont('Helvetica', 9)
-        canvas.setFillColor(colors.grey)
+        canvas.setFillColor(self.colors['footer'])
         canvas.drawString(50, 30, f"Generated on {datetime.now().strftime('%B %d, %Y')}")
         canvas.drawRightString(letter[0] - 50, 30, f"Page {doc.page}")
         
@@ -83,34 +88,16 @@ class PortfolioPDFGenerator:
     def _process_image(self, image_path, max_width=4*inch, max_height=3*inch):
         """Process and resize image for PDF"""
         try:
-            if os.path.exists(image_path):
-                # Local file
-                pil_img = PILImage.open(image_path)
-            else:
+            if not os.path.exists(image_path):
                 # Assume it's a URL or create a placeholder
                 return self._create_placeholder_image(max_width, max_height)
             
-            # Calculate new dimensions maintaining aspect ratio
-            width, height = pil_img.size
-            aspect_ratio = width / height
-            
-            if width > height:
-                new_width = min(max_width, width)
-                new_height = new_width / aspect_ratio
-                if new_height > max_height:
-                    new_height = max_height
-                    new_width = new_height * aspect_ratio
-            else:
-                new_height = min(max_height, height)
-                new_width = new_height * aspect_ratio
-                if new_width > max_width:
-                    new_width = max_width
-                    new_height = new_width / aspect_ratio
-            
-            return Image(image_path, width=new_width, height=new_height)
+            # Pre-sized derivative, so ReportLab never touches the full-size WebP
+            derivative = image_cache.get(image_path, max_width, max_height)
+            return Image(derivative.source(), width=derivative.width, height=derivative.height)
             
         except Exception as e:
-            current_app.logger.warning(f"Could not process image {image_path}: {str(e)}")
+            logger.warning(f"Could not process image {image_path}: {str(e)}")
             return self._create_placeholder_image(max_width, max_height)
     
     def _create_placeholder_image(self, width, height):
@@ -125,9 +112,90 @@ class PortfolioPDFGenerator:
         
         return placeholder
     
-    def generate_portfolio_pdf(self, portfolio_data):
-        """Generate a comprehensive portfolio PDF"""
-        buffer = io.BytesIO()
+    def _section(self, name, key, build):
+        """Flowables for one section, reused from earlier renders with the same inputs"""
+        return fragment_cache.get((__name__, name), key, build)
+    
+    def _build_meta_section(self, meta_data):
+        """Project meta information table"""
+        meta_table = Table([list(row) for row in meta_data], colWidths=[1.5*inch, 4*inch])
+        meta_table.setStyle(self.table_styles['MetaTable'])
+        
+        return [meta_table, Spacer(1, 30)]
+    
+    def _build_screenshots_section(self):
+        """Heading followed by the full-width project screenshots"""
+        section = [
+            Paragraph("Project Screenshots", self.custom_styles['CustomSubtitle']),
+            Spacer(1, 10)
+        ]
+        
+        # Add main portfolio images
+        for img_path in self.main_images:
+            if os.path.exists(img_path):
+                img = self._process_image(img_path, max_width=5*inch, max_height=3.5*inch)
+                section.append(img)
+                section.append(Spacer(1, 15))
+        
+        return section
+    
+    def _build_features_section(self, features):
+        """Key features as a bullet list"""
+        section = [Paragraph("Key Features", self.custom_styles['CustomSubtitle'])]
+        
+        for feature in features:
+            section.append(Paragraph(f"• {feature}", self.custom_styles['FeatureList']))
+        
+        section.append(Spacer(1, 20))
+        return section
+    
+    def _build_tech_stack_section(self, tech_stack):
+        """Comma separated technology stack"""
+        tech_text = ", ".join(tech_stack)
+        return [
+            Paragraph("Technology Stack", self.custom_styles['CustomSubtitle']),
+            Paragraph(tech_text, self.custom_styles['CustomBody']),
+            Spacer(1, 30)
+        ]
+    
+    def _build_gallery_section(self):
+        """Additional screenshots laid out two per row"""
+        gallery_images = self.gallery_images
+        
+        section = [
+            Paragraph("Additional Screenshots", self.custom_styles['CustomSubtitle']),
+            Spacer(1, 10)
+        ]
+        
+        # Create a 2x2 grid of smaller images
+        for i in range(0, len(gallery_images), 2):
+            row_images = []
+            for j in range(2):
+                if i + j < len(gallery_images):
+                    img_path = gallery_images[i + j]
+                    if os.path.exists(img_path):
+                        img = self._process_image(img_path, max_width=2.5*inch, max_height=2*inch)
+                        row_images.append(img)
+                    else:
+                        row_images.append(self._create_placeholder_image(2.5*inch, 2*inch))
+            
+            if len(row_images) == 2:
+                img_table = Table([row_images], colWidths=[2.8*inch, 2.8*inch])
+                img_table.setStyle(self.table_styles['ImageGrid'])
+                section.append(img_table)
+                section.append(Spacer(1, 15))
+        
+        return section
+    
+    def generate_portfolio_pdf(self, portfolio_data, output=None):
+        """
+        Generate a comprehensive portfolio PDF
+        
+        The document is written to output when given, otherwise to a spooled
+        temporary file that moves to disk once it exceeds SPOOL_MAX_MEMORY.
+        The returned file is positioned at the start.
+        """
+        buffer = output if output is not None else tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
         
         # Create document
         doc = SimpleDocTemplate(
@@ -147,30 +215,15 @@ class PortfolioPDFGenerator:
         story.append(Spacer(1, 20))
         
         # Project Badge and Meta Information
-        meta_data = [
-            ['Project Type:', portfolio_data.get('project_type', 'UX/UI Design')],
-            ['Date:', portfolio_data.get('date', 'September 2024')],
-            ['Client:', portfolio_data.get('client', 'DigitalCraft Solutions')],
-            ['Website:', portfolio_data.get('website', 'projectwebsite.example.com')]
-        ]
-        
-        meta_table = Table(meta_data, colWidths=[1.5*inch, 4*inch])
-        meta_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f8f9fa')),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#2c5aa0')),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
-            ('LEFTPADDING', (0, 0), (-1, -1), 10),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
-        
-        story.append(meta_table)
-        story.append(Spacer(1, 30))
+        meta_data = (
+            ('Project Type:', portfolio_data.get('project_type', 'UX/UI Design')),
+            ('Date:', portfolio_data.get('date', 'September 2024')),
+            ('Client:', portfolio_data.get('client', 'DigitalCraft Solutions')),
+            ('Website:', portfolio_data.get('website', 'projectwebsite.example.com'))
+        )
+        story.extend(self._section(
+            'meta', freeze(meta_data), lambda: self._build_meta_section(meta_data)
+        ))
         
         # Project Title
         story.append(Paragraph(
@@ -180,21 +233,9 @@ class PortfolioPDFGenerator:
         story.append(Spacer(1, 20))
         
         # Main Project Images
-        story.append(Paragraph("Project Screenshots", self.custom_styles['CustomSubtitle']))
-        story.append(Spacer(1, 10))
-        
-        # Add main portfolio images
-        main_images = [
-            'static/img/portfolio/portfolio-5.webp',
-            'static/img/portfolio/portfolio-7.webp',
-            'static/img/portfolio/portfolio-8.webp'
-        ]
-        
-        for img_path in main_images:
-            if os.path.exists(img_path):
-                img = self._process_image(img_path, max_width=5*inch, max_height=3.5*inch)
-                story.append(img)
-                story.append(Spacer(1, 15))
+        story.extend(self._section(
+            'screenshots', file_state(self.main_images), self._build_screenshots_section
+        ))
         
         # Project Overview
         story.append(Paragraph("Project Overview", self.custom_styles['CustomSubtitle']))
@@ -230,7 +271,6 @@ class PortfolioPDFGenerator:
         story.append(Spacer(1, 20))
         
         # Key Features
-        story.append(Paragraph("Key Features", self.custom_styles['CustomSubtitle']))
         features = portfolio_data.get('features', [
             "Real-time Data Visualization",
             "User Role Management", 
@@ -239,55 +279,22 @@ class PortfolioPDFGenerator:
             "Data Export Options",
             "Multi-device Support"
         ])
-        
-        for feature in features:
-            story.append(Paragraph(f"• {feature}", self.custom_styles['FeatureList']))
-        
-        story.append(Spacer(1, 20))
+        story.extend(self._section(
+            'features', freeze(features), lambda: self._build_features_section(features)
+        ))
         
         # Technology Stack
-        story.append(Paragraph("Technology Stack", self.custom_styles['CustomSubtitle']))
         tech_stack = portfolio_data.get('tech_stack', [
             'Angular', 'Express.js', 'PostgreSQL', 'GraphQL', 'Firebase'
         ])
-        
-        tech_text = ", ".join(tech_stack)
-        story.append(Paragraph(tech_text, self.custom_styles['CustomBody']))
-        story.append(Spacer(1, 30))
+        story.extend(self._section(
+            'tech_stack', freeze(tech_stack), lambda: self._build_tech_stack_section(tech_stack)
+        ))
         
         # Gallery Images (if any)
-        gallery_images = [
-            'static/img/portfolio/portfolio-4.webp',
-            'static/img/portfolio/portfolio-6.webp',
-            'static/img/portfolio/portfolio-11.webp',
-            'static/img/portfolio/portfolio-12.webp'
-        ]
-        
-        story.append(Paragraph("Additional Screenshots", self.custom_styles['CustomSubtitle']))
-        story.append(Spacer(1, 10))
-        
-        # Create a 2x2 grid of smaller images
-        for i in range(0, len(gallery_images), 2):
-            row_images = []
-            for j in range(2):
-                if i + j < len(gallery_images):
-                    img_path = gallery_images[i + j]
-                    if os.path.exists(img_path):
-                        img = self._process_image(img_path, max_width=2.5*inch, max_height=2*inch)
-                        row_images.append(img)
-                    else:
-                        row_images.append(self._create_placeholder_image(2.5*inch, 2*inch))
-            
-            if len(row_images) == 2:
-                img_table = Table([row_images], colWidths=[2.8*inch, 2.8*inch])
-                img_table.setStyle(TableStyle([
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-                ]))
-                story.append(img_table)
-                story.append(Spacer(1, 15))
+        story.extend(self._section(
+            'gallery', file_state(self.gallery_images), self._build_gallery_section
+        ))
         
         # Build PDF
         doc.build(story, onFirstPage=self._add_header_footer, onLaterPages=self._add_header_footer)
@@ -297,24 +304,4 @@ class PortfolioPDFGenerator:
 
     def generate_simple_pdf(self):
         """Generate a simple portfolio PDF with default data"""
-        default_data = {
-            'project_type': 'UX/UI Design',
-            'date': 'September 2024',
-            'client': 'DigitalCraft Solutions',
-            'website': 'projectwebsite.example.com',
-            'title': 'Innovative Financial Dashboard App',
-            'overview': 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. Maecenas varius tortor nibh, sit amet tempor nibh finibus et. Aenean eu enim justo. Vestibulum aliquam hendrerit molestie.',
-            'challenge': 'Mauris blandit aliquet elit, eget tincidunt nibh pulvinar a. Vivamus suscipit tortor eget felis porttitor volutpat.',
-            'solution': 'Donec sollicitudin molestie malesuada. Curabitur arcu erat, accumsan id imperdiet et, porttitor at sem.',
-            'features': [
-                'Real-time Data Visualization',
-                'User Role Management',
-                'Secure Authentication',
-                'Customizable Dashboards',
-                'Data Export Options',
-                'Multi-device Support'
-            ],
-            'tech_stack': ['Angular', 'Express.js', 'PostgreSQL', 'GraphQL', 'Firebase']
-        }
-        
-        return self.generate_portfolio_pdf(default_data)
+        return self.generate_portfolio_pdf(DEFAULT_PORTFOLIO_DATA)
@@ -0,0 +1,307 @@
+import os
+import re
+import time
+import logging
+import importlib
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from pdf_cache import PDFCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'pdf_jobs')
+
+# Fields a client may set when submitting a render job
+PORTFOLIO_FIELDS = (
+    'project_type', 'date', 'client', 'website', 'title',
+    'overview', 'challenge', 'solution', 'features', 'tech_stack'
+)
+
+# Bounds on client-supplied portfolio data
+LIST_FIELDS = ('features', 'tech_stack')
+MAX_TEXT_LENGTH = 2000
+MAX_LIST_ITEMS = 20
+MAX_ITEM_LENGTH = 100
+
+_JOB_ID_RE = re.compile(r'^[0-9a-f]{64}$')
+
+# Job states written to the <job_id>.pending marker
+QUEUED = 'queued'
+RUNNING = 'running'
+
+
+class QueueFullError(Exception):
+    """Raised when too many render jobs are already waiting"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"PDF render queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobFailedError(Exception):
+    """Raised when a render job finished with an error"""
+
+
+class PortfolioDataError(ValueError):
+    """Raised when submitted portfolio data has the wrong types or sizes"""
+
+
+def render_to_file(module_name, class_name, portfolio_data, output_path, pending_path=None):
+    """Render one portfolio PDF in a worker process and write it to disk"""
+    if pending_path is not None:
+        _write_marker(pending_path, RUNNING)
+    module = importlib.import_module(module_name)
+    generator = getattr(module, class_name)()
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            generator.generate_portfolio_pdf(portfolio_data, output=f)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return os.path.getsize(output_path)
+
+
+def _write_marker(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _check_field(field, value):
+    if field in LIST_FIELDS:
+        if not isinstance(value, list) or len(value) > MAX_LIST_ITEMS:
+            raise PortfolioDataError(f"{field} must be a list of at most {MAX_LIST_ITEMS} strings")
+        for item in value:
+            if not isinstance(item, str) or len(item) > MAX_ITEM_LENGTH:
+                raise PortfolioDataError(f"{field} items must be strings of at most {MAX_ITEM_LENGTH} characters")
+    elif not isinstance(value, str) or len(value) > MAX_TEXT_LENGTH:
+        raise PortfolioDataError(f"{field} must be a string of at most {MAX_TEXT_LENGTH} characters")
+
+
+def clean_portfolio_data(data, defaults):
+    """
+    Keep only known portfolio fields, falling back to defaults
+
+    Raises PortfolioDataError if a field has the wrong type or is too long.
+    """
+    if not isinstance(data, dict):
+        raise PortfolioDataError('Portfolio data must be an object')
+    cleaned = dict(defaults)
+    for field in PORTFOLIO_FIELDS:
+        if field in data:
+            _check_field(field, data[field])
+            cleaned[field] = data[field]
+    return cleaned
+
+
+class PDFJobQueue:
+    """
+    Renders portfolio PDFs on a bounded process pool
+
+    Job IDs are the content-addressed cache key of the portfolio data, so
+    identical submissions share one render. Job state lives in jobs_dir,
+    where every gunicorn worker can read it: a <job_id>.pending marker
+    while the job is queued or running, then the PDF or a <job_id>.error
+    file. A pending marker older than stale_after belongs to a worker that
+    died mid-render and counts as failed. At most max_pending jobs may be
+    queued or running in this process; beyond that submit() raises
+    QueueFullError.
+    """
+
+    def __init__(self, max_workers=2, max_pending=8, jobs_dir=DEFAULT_JOBS_DIR,
+                 retry_after=5, result_ttl=24 * 3600, stale_after=600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.jobs_dir = jobs_dir
+        self.retry_after = retry_after
+        self.result_ttl = result_ttl
+        self.stale_after = stale_after
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._last_prune = 0
+
+    def _get_executor(self):
+        # Created lazily so each gunicorn worker forks its own pool after boot
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def result_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.pdf")
+
+    def _error_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.error")
+
+    def _pending_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.pending")
+
+    def _pending_state(self, job_id):
+        """QUEUED or RUNNING while another worker has the job, else None"""
+        path = self._pending_path(job_id)
+        try:
+            if time.time() - os.path.getmtime(path) > self.stale_after:
+                return None
+            with open(path) as f:
+                return f.read() or QUEUED
+        except OSError:
+            return None
+
+    @staticmethod
+    def is_valid_job_id(job_id):
+        return bool(_JOB_ID_RE.match(job_id or ''))
+
+    def _claim(self, job_id):
+        """Create the pending marker unless a live one exists; False if it does"""
+        path = self._pending_path(job_id)
+        while True:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if self._pending_state(job_id) is not None:
+                    return False
+                # Left behind by a worker that died
+                _remove(path)
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(QUEUED)
+            return True
+
+    def submit(self, generator_cls, portfolio_data):
+        """Queue a render and return its job ID"""
+        job_id = PDFCache.make_key(portfolio_data, getattr(generator_cls, 'image_paths', ()))
+        if os.path.exists(self.result_path(job_id)):
+            return job_id
+
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is not None and not future.done():
+                return job_id
+
+            pending = sum(1 for f in self._futures.values() if not f.done())
+            if pending >= self.max_pending:
+                raise QueueFullError(self.retry_after)
+
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            if not self._claim(job_id):
+                # Another worker is rendering it
+                return job_id
+            _remove(self._error_path(job_id))
+
+            future = self._get_executor().submit(
+                render_to_file,
+                generator_cls.__module__,
+                generator_cls.__name__,
+                portfolio_data,
+                self.result_path(job_id),
+                self._pending_path(job_id)
+            )
+            future.add_done_callback(lambda f, job_id=job_id: self._on_done(job_id, f))
+            self._futures[job_id] = future
+
+        self._prune()
+        return job_id
+
+    def _on_done(self, job_id, future):
+        error = future.exception()
+        if error is not None:
+            logger.error(f"PDF job {job_id[:12]} failed: {str(error)}")
+            try:
+                _write_marker(self._error_path(job_id), str(error))
+            except OSError:
+                pass
+        _remove(self._pending_path(job_id))
+        with self._lock:
+            if self._futures.get(job_id) is future:
+                del self._futures[job_id]
+
+    def status(self, job_id):
+        """Return the job state as a dict, or None for jobs no worker has seen"""
+        path = self.result_path(job_id)
+        if os.path.exists(path):
+            return {'id': job_id, 'state': 'done', 'size': os.path.getsize(path)}
+
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            return {'id': job_id, 'state': RUNNING if future.running() else QUEUED}
+
+        state = self._pending_state(job_id)
+        if state is not None:
+            return {'id': job_id, 'state': state}
+
+        error_path = self._error_path(job_id)
+        if os.path.exists(error_path):
+            with open(error_path) as f:
+                return {'id': job_id, 'state': 'failed', 'error': f.read()}
+        if os.path.exists(self._pending_path(job_id)):
+            return {'id': job_id, 'state': 'failed', 'error': 'The worker rendering this job stopped'}
+        return None
+
+    def wait(self, job_id, timeout):
+        """Block until the job finishes and return the path of its PDF"""
+        path = self.result_path(job_id)
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except FutureTimeoutError:
+                raise
+            except Exception as e:
+                raise JobFailedError(str(e)) from e
+        else:
+            # Rendered by another worker: poll its markers
+            deadline = time.monotonic() + timeout
+            while not os.path.exists(path) and self._pending_state(job_id) is not None:
+                if time.monotonic() >= deadline:
+                    raise FutureTimeoutError()
+                time.sleep(0.1)
+        if not os.path.exists(path):
+            raise JobFailedError(f"PDF job {job_id[:12]} produced no output")
+        return path
+
+    def render(self, generator_cls, portfolio_data, timeout=60):
+        """Render synchronously through the pool and return the open PDF file"""
+        job_id = self.submit(generator_cls, portfolio_data)
+        return open(self.wait(job_id, timeout), 'rb')
+
+    def _prune(self):
+        """Remove finished results older than result_ttl"""
+        now = time.time()
+        if now - self._last_prune < 600:
+            return
+        self._last_prune = now
+        try:
+            names = os.listdir(self.jobs_dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.jobs_dir, name)
+            try:
+                if now - os.path.getmtime(path) > self.result_ttl:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+# Process-wide job queue used by the PDF routes
+pdf_jobs = PDFJobQueue(
+    max_workers=int(os.environ.get('PDF_WORKERS', 2)),
+    max_pending=int(os.environ.get('PDF_MAX_PENDING_JOBS', 8)),
+    jobs_dir=os.environ.get('PDF_JOBS_DIR', DEFAULT_JOBS_DIR),
+    retry_after=int(os.environ.get('PDF_RETRY_AFTER', 5)),
+    stale_after=int(os.environ.get('PDF_JOB_STALE_AFTER', 600))
+)
@@ -0,0 +1,154 @@
+import threading
+from types import MappingProxyType
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from reportlab.platypus import TableStyle
+
+
+class FrozenStyleError(AttributeError):
+    """Raised when code tries to modify a shared style"""
+
+
+class _FrozenParagraphStyle(ParagraphStyle):
+    """ParagraphStyle that rejects attribute changes"""
+
+    def __setattr__(self, name, value):
+        raise FrozenStyleError(f"Style '{self.name}' is shared and read-only")
+
+
+class _FrozenTableStyle(TableStyle):
+    """TableStyle that rejects new commands"""
+
+    def add(self, *cmd):
+        raise FrozenStyleError("Table style is shared and read-only")
+
+
+def freeze_style(style):
+    """Make a fully built paragraph or table style read-only in place"""
+    # ReportLab requires a style and its parent to share a class, so styles
+    # are built as plain ParagraphStyle objects and only switched over here
+    if isinstance(style, ParagraphStyle):
+        style.__class__ = _FrozenParagraphStyle
+    elif isinstance(style, TableStyle):
+        style.__dict__['_cmds'] = tuple(style._cmds)
+        style.__class__ = _FrozenTableStyle
+    return style
+
+
+def build_colors():
+    """Brand colors used by the portfolio PDFs"""
+    return {
+        'primary': colors.HexColor('#2c5aa0'),
+        'secondary': colors.HexColor('#1f4788'),
+        'muted_background': colors.HexColor('#f8f9fa'),
+        'grid': colors.lightgrey,
+        'footer': colors.grey
+    }
+
+
+def build_paragraph_styles(palette):
+    """Create custom paragraph styles"""
+    sample = getSampleStyleSheet()
+    styles = {}
+
+    styles['CustomTitle'] = ParagraphStyle(
+        'CustomTitle',
+        parent=sample['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        textColor=palette['primary']
+    )
+
+    styles['CustomSubtitle'] = ParagraphStyle(
+        'CustomSubtitle',
+        parent=sample['Heading2'],
+        fontSize=16,
+        spaceAfter=20,
+        alignment=TA_LEFT,
+        textColor=palette['secondary']
+    )
+
+    styles['CustomBody'] = ParagraphStyle(
+        'CustomBody',
+        parent=sample['Normal'],
+        fontSize=11,
+        spaceAfter=12,
+        alignment=TA_JUSTIFY,
+        leading=14
+    )
+
+    styles['FeatureList'] = ParagraphStyle(
+        'FeatureList',
+        parent=sample['Normal'],
+        fontSize=10,
+        spaceAfter=8,
+        leftIndent=20,
+        bulletIndent=10
+    )
+
+    return styles
+
+
+def build_table_styles(palette):
+    """Create the table styles for the meta table and image grid"""
+    styles = {}
+
+    styles['MetaTable'] = TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), palette['muted_background']),
+        ('TEXTCOLOR', (0, 0), (0, -1), palette['primary']),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('GRID', (0, 0), (-1, -1), 1, palette['grid']),
+        ('LEFTPADDING', (0, 0), (-1, -1), 10),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ])
+
+    styles['ImageGrid'] = TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 10),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+    ])
+
+    return styles
+
+
+class StyleRegistry:
+    """
+    Immutable set of styles shared by every PortfolioPDFGenerator
+
+    The mappings are read-only views and the styles inside them refuse
+    modification, so one instance can be shared across threads.
+    """
+
+    def __init__(self):
+        palette = build_colors()
+        paragraph_styles = build_paragraph_styles(palette)
+        table_styles = build_table_styles(palette)
+
+        for style in list(paragraph_styles.values()) + list(table_styles.values()):
+            freeze_style(style)
+
+        self.colors = MappingProxyType(palette)
+        self.paragraph_styles = MappingProxyType(paragraph_styles)
+        self.table_styles = MappingProxyType(table_styles)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_style_registry():
+    """Return the process-wide style registry, building it on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = StyleRegistry()
+    return _registry
@@ -1,12 +1,27 @@
 import os
-from flask import render_template, request, jsonify, flash, redirect, url_for, send_from_directory, send_file
+from flask import render_template, request, jsonify, flash, redirect, url_for, send_from_directory, send_file, Response, stream_with_context
 from app import app, db
-from models import Contact, Newsletter
+from models import Contact, Newsletter, EmailOutbox
 from forms import ContactForm, NewsletterForm
-from sqlalchemy.exc import IntegrityError
 from email_service import send_contact_email, send_auto_reply_email
-from pdf_generator import PortfolioPDFGenerator  # Import the correct class
+from email_transport import get_transport
+from email_dispatch import send_or_defer, deferred_emails
+from circuit_breaker import email_breaker, broadcast_breaker, OPEN
+from outbox import enqueue_contact_emails, outbox_enabled, outbox_worker, outbox_stats
+from digest import digest_enabled, is_priority
+from pdf_generator import PortfolioPDFGenerator, DEFAULT_PORTFOLIO_DATA  # Import the correct class
+from pdf_cache import send_cached_pdf
+from pdf_jobs import pdf_jobs, QueueFullError, PortfolioDataError, clean_portfolio_data
+from sqlite_backend import retry_locked
+from db_pool import pool_stats
+from pagination import keyset_page, parse_page_size, parse_bool, PaginationError
+from subscriptions import subscribe, import_subscribers, iter_csv_emails, ACTIVE, REACTIVATED
+from admin_queries import contact_listing_query, newsletter_listing_query, triage_contacts, SelectionError
+from exports import export_stream, export_filename, ExportError, CONTENT_TYPES
+from stats import get_stats, record_contact, record_triage, MAX_DAYS
 import io
+import csv
+from datetime import datetime
 
 # Serve static files
 @app.route('/static/<path:filename>')
@@ -55,6 +70,28 @@ def starter_page():
     """Serve the starter page"""
     return render_template('starter-page.html')
 
+@retry_locked(db.session)
+def _save_contact(contact_data, admin_email, queue_emails):
+    """Store a contact submission, queueing its emails in the same commit"""
+    contact = Contact(
+        name=contact_data['name'],
+        email=contact_data['email'],
+        subject=contact_data['subject'],
+        message=contact_data['message'],
+        phone=contact_data['phone'],
+        company=contact_data['company']
+    )
+    db.session.add(contact)
+    if queue_emails:
+        db.session.flush()
+        # In digest mode the admin hears about this contact in the next
+        # digest, unless the subject marks it as urgent
+        notify_admin = not digest_enabled() or is_priority(contact_data)
+        enqueue_contact_emails(contact.id, contact_data, admin_email, notify_admin, contact.created_at)
+    record_contact()
+    db.session.commit()
+    return contact
+
 # Contact form handling
 @app.route('/contact', methods=['POST'])
 def submit_contact():
@@ -73,43 +110,41 @@ def submit_contact():
                 'company': form.company.data.strip() if form.company.data else None
             }
             
-            # Check if database is available and save to DB
-            database_url = os.environ.get("DATABASE_URL")
-            if database_url and not database_url.startswith("sqlite"):
-                try:
-                    # Create new contact entry
-                    contact = Contact(
-                        name=contact_data['name'],
-                        email=contact_data['email'],
-                        subject=contact_data['subject'],
-                        message=contact_data['message'],
-                        phone=contact_data['phone'],
-                        company=contact_data['company']
-                    )
-                    
-                    db.session.add(contact)
-                    db.session.commit()
-                    app.logger.info(f"New contact submission from {contact.email}")
-                except Exception as db_error:
-                    app.logger.warning(f"Database save failed, continuing with email: {str(db_error)}")
-            else:
-                app.logger.warning("Database not configured, skipping DB save")
-            
-            # Send email notification to admin
             admin_email = os.environ.get('ADMIN_EMAIL', 'harshilgajjar602@gmail.com')
-            email_sent, email_result = send_contact_email(contact_data, admin_email)
+            submitted_at = datetime.now()
             
-            if email_sent:
-                app.logger.info(f"Contact notification email sent to {admin_email}")
+            # Save the contact, and with the outbox its emails, in one
+            # transaction; the outbox worker sends them after the response
+            queued = outbox_enabled()
+            try:
+                contact = _save_contact(contact_data, admin_email, queued)
+                if queued:
+                    outbox_worker.wake()
+                app.logger.info(f"New contact submission from {contact.email}")
+            except Exception as db_error:
+                db.session.rollback()
+                queued = False
+                app.logger.warning(f"Database save failed, continuing with email: {str(db_error)}")
+            
+            if not queued:
+                # No outbox available, send both emails in the request at the
+                # same time, or defer them while the email circuit is open
+                results = send_or_defer({
+                    'notification': (send_contact_email, (contact_data, admin_email, submitted_at)),
+                    'auto_reply': (send_auto_reply_email, (contact_data, submitted_at))
+                })
+                
+                email_sent, email_result = results['notification']
+                if email_sent:
+                    app.logger.info(f"Contact notification email sent to {admin_email}")
+                else:
+                    app.logger.error(f"Failed to send contact notification email: {email_result}")
                 
-                # Send auto-reply to customer
-                auto_reply_sent, auto_reply_result = send_auto_reply_email(contact_data)
+                auto_reply_sent, auto_reply_result = results['auto_reply']
                 if auto_reply_sent:
                     app.logger.info(f"Auto-reply sent to {contact_data['email']}")
                 else:
                     app.logger.warning(f"Auto-reply failed: {auto_reply_result}")
-            else:
-                app.logger.error(f"Failed to send contact notification email: {email_result}")
             
             flash('Thank you for your message! We will get back to you soon.', 'success')
             return jsonify({
@@ -156,39 +191,20 @@ def subscribe_newsletter():
         try:
             email = form.email.data.strip().lower()
             
-            # Check if database is available
-            database_url = os.environ.get("DATABASE_URL")
-            if not database_url or database_url.startswith("sqlite"):
-                # Database not configured, just return success
-                app.logger.warning("Database not configured, skipping newsletter subscription")
+            # One INSERT ... ON CONFLICT round trip decides new / active / reactivated
+            outcome = subscribe(email)
+            
+            if outcome == ACTIVE:
                 return jsonify({
-                    'status': 'success',
-                    'message': 'Thank you for subscribing to our newsletter!'
+                    'status': 'info',
+                    'message': 'You are already subscribed to our newsletter!'
                 }), 200
             
-            # Check if email already exists
-            existing_subscription = Newsletter.query.filter_by(email=email).first()
-            
-            if existing_subscription:
-                if existing_subscription.is_active:
-                    return jsonify({
-                        'status': 'info',
-                        'message': 'You are already subscribed to our newsletter!'
-                    }), 200
-                else:
-                    # Reactivate subscription
-                    existing_subscription.is_active = True
-                    db.session.commit()
-                    
-                    return jsonify({
-                        'status': 'success',
-                        'message': 'Welcome back! Your newsletter subscription has been reactivated.'
-                    }), 200
-            
-            # Create new subscription
-            subscription = Newsletter(email=email)
-            db.session.add(subscription)
-            db.session.commit()
+            if outcome == REACTIVATED:
+                return jsonify({
+                    'status': 'success',
+                    'message': 'Welcome back! Your newsletter subscription has been reactivated.'
+                }), 200
             
             app.logger.info(f"New newsletter subscription: {email}")
             
@@ -197,13 +213,6 @@ def subscribe_newsletter():
                 'message': 'Thank you for subscribing to our newsletter!'
             }), 200
             
-        except IntegrityError:
-            db.session.rollback()
-            return jsonify({
-                'status': 'info',
-                'message': 'You are already subscribed to our newsletter!'
-            }), 200
-            
         except Exception as e:
             db.session.rollback()
             app.logger.error(f"Error saving newsletter subscription: {str(e)}")
@@ -229,23 +238,158 @@ def subscribe_newsletter():
         }), 400
 
 # Admin routes for viewing submissions (optional)
+def _page_response(rows, next_cursor, limit):
+    return jsonify({
+        'items': [row.to_dict() for row in rows],
+        'next_cursor': next_cursor,
+        'limit': limit
+    })
+
 @app.route('/admin/contacts')
 def admin_contacts():
-    """View all contact submissions (admin only)"""
-    contacts = Contact.query.order_by(Contact.created_at.desc()).all()
-    return jsonify([contact.to_dict() for contact in contacts])
+    """
+    Contact submissions, newest first, one page at a time (admin only)
+    
+    Query parameters: limit, cursor (next_cursor of the previous page),
+    is_read, is_archived, since, until (ISO dates) and email_prefix.
+    """
+    try:
+        limit = parse_page_size(request.args.get('limit'))
+        query = contact_listing_query(request.args)
+        rows, next_cursor = keyset_page(query, Contact.created_at, Contact.id, request.args.get('cursor'), limit)
+        return _page_response(rows, next_cursor, limit)
+    except PaginationError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
 
 @app.route('/admin/newsletters')
 def admin_newsletters():
-    """View all newsletter subscriptions (admin only)"""
-    subscriptions = Newsletter.query.order_by(Newsletter.subscribed_at.desc()).all()
-    return jsonify([sub.to_dict() for sub in subscriptions])
+    """
+    Newsletter subscriptions, newest first, one page at a time (admin only)
+    
+    Query parameters: limit, cursor, is_active, since, until and email_prefix.
+    """
+    try:
+        limit = parse_page_size(request.args.get('limit'))
+        query = newsletter_listing_query(request.args)
+        rows, next_cursor = keyset_page(
+            query, Newsletter.subscribed_at, Newsletter.id, request.args.get('cursor'), limit
+        )
+        return _page_response(rows, next_cursor, limit)
+    except PaginationError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@app.route('/admin/<any(contacts, newsletters):name>/export')
+def admin_export(name):
+    """
+    Stream every matching contact or subscriber as a file download (admin only)
+    
+    Query parameters: format (ndjson, csv, or with pyarrow installed
+    parquet or arrow; default ndjson), gzip, and the same filters as the
+    paginated listing.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    try:
+        compress = parse_bool(request.args.get('gzip'), 'gzip') or False
+        stream = export_stream(name, fmt, request.args, compress)
+    except (ExportError, PaginationError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    app.logger.info(f"Streaming {name} export as {fmt}{' (gzip)' if compress else ''}")
+    return Response(
+        stream_with_context(stream),
+        mimetype='application/gzip' if compress else CONTENT_TYPES[fmt],
+        headers={'Content-Disposition': f"attachment; filename={export_filename(name, fmt, compress)}"}
+    )
+
+@app.route('/admin/newsletters/import', methods=['POST'])
+def admin_import_newsletters():
+    """
+    Bulk-subscribe the addresses in a CSV upload (admin only)
+    
+    Accepts a multipart "file" field or a raw text/csv body, with the CSRF
+    token in a csrf_token field or X-CSRFToken header; scripts use
+    `flask import-newsletter` instead. The CSV is read as a stream and
+    written in chunked upserts; the response has the inserted,
+    reactivated, skipped and invalid counts.
+    """
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    try:
+        lines = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        counts = import_subscribers(iter_csv_emails(lines))
+    except (UnicodeDecodeError, csv.Error) as e:
+        db.session.rollback()
+        return jsonify({'status': 'error', 'message': f"Could not read the CSV: {e}"}), 400
+    app.logger.info(f"Imported newsletter subscribers: {counts}")
+    return jsonify({'status': 'success', **counts})
+
+@app.route('/admin/outbox')
+def admin_outbox():
+    """Outbox delivery state: counts per status, recent failures and transport stats"""
+    failures = EmailOutbox.query.filter(EmailOutbox.last_error.isnot(None)) \
+        .order_by(EmailOutbox.id.desc()).limit(20).all()
+    return jsonify({
+        'counts': outbox_stats(),
+        'recent_failures': [entry.to_dict() for entry in failures],
+        'transport': get_transport().stats()
+    })
+
+@app.route('/admin/stats')
+def admin_stats():
+    """
+    Contact and subscriber totals plus daily counts (admin only)
+    
+    Query parameter: days (default 30). Served from the counters the write
+    paths keep up to date, so the cost grows with the days asked for, not
+    with the number of contacts or subscribers.
+    """
+    days = request.args.get('days', '30')
+    if not days.isdigit() or not 1 <= int(days) <= MAX_DAYS:
+        return jsonify({'status': 'error', 'message': f"days must be between 1 and {MAX_DAYS}"}), 400
+    return jsonify({'status': 'success', **get_stats(int(days))})
+
+@app.route('/health')
+def health():
+    """Liveness plus the state of the email circuit breaker and the DB pool"""
+    breaker = email_breaker.stats()
+    return jsonify({
+        'status': 'degraded' if breaker['state'] == OPEN else 'healthy',
+        'email': {
+            'breaker': breaker,
+            'deferred': deferred_emails.stats(),
+            'transport': get_transport().stats(),
+            'broadcast_breaker': broadcast_breaker.stats()
+        },
+        'database': {'pool': pool_stats(db.engine)}
+    }), 200
+
+@app.route('/admin/contacts/bulk/<any(read, unread, archive, unarchive):action>', methods=['POST'])
+def admin_triage_contacts(action):
+    """
+    Mark many contacts read or unread, or (un)archive them, in one UPDATE (admin only)
+    
+    JSON body with one of: {"ids": [1, 2, 3]}, {"id_range": [100, 500]} or
+    {"filter": {"until": "2024-01-01", "is_read": false}} (the listing
+    filters), with the CSRF token in an X-CSRFToken header like the
+    single-contact route. Responds with the number of contacts changed.
+    """
+    selection = request.get_json(silent=True)
+    if not isinstance(selection, dict):
+        return jsonify({'status': 'error', 'message': 'Expected a JSON object'}), 400
+    try:
+        updated = triage_contacts(action, selection)
+    except (SelectionError, PaginationError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    app.logger.info(f"Bulk {action}: {updated} contacts updated")
+    return jsonify({'status': 'success', 'action': action, 'updated': updated})
 
 @app.route('/admin/contact/<int:contact_id>/read', methods=['POST'])
 def mark_contact_read(contact_id):
     """Mark a contact as read"""
-    contact = Contact.query.get_or_404(contact_id)
-    contact.is_read = True
+    Contact.query.get_or_404(contact_id)
+    # Conditional UPDATE, so two concurrent clicks count the contact once
+    updated = Contact.query.filter_by(id=contact_id, is_read=False) \
+        .update({'is_read': True}, synchronize_session=False)
+    record_triage('read', updated)
     db.session.commit()
     
     return jsonify({
@@ -253,25 +397,37 @@ def mark_contact_read(contact_id):
         'message': 'Contact marked as read'
     })
 
+def _render_pdf_job(generator_cls, portfolio_data):
+    """Render through the process pool and wait for the result"""
+    timeout = int(os.environ.get('PDF_JOB_TIMEOUT', 60))
+    return pdf_jobs.render(generator_cls, portfolio_data, timeout=timeout)
+
+def _queue_full_response(error):
+    """Shed load while the PDF render queue is full"""
+    response = jsonify({
+        'status': 'error',
+        'message': 'PDF generation is busy. Please try again shortly.'
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
 # PDF Generation route
 @app.route('/generate-pdf')
 def generate_pdf():
     """Generate PDF for the Financial Dashboard project"""
     try:
-        # Instantiate the PDF generator
-        pdf_generator = PortfolioPDFGenerator()
-        
-        # Generate a simple PDF with default data
-        pdf_buffer = pdf_generator.generate_simple_pdf()
-        
-        # Send the PDF as a downloadable file
-        return send_file(
-            pdf_buffer,
-            as_attachment=True,
+        # Serve the default portfolio PDF, rendering it only on a cache miss
+        return send_cached_pdf(
+            PortfolioPDFGenerator,
+            DEFAULT_PORTFOLIO_DATA,
             download_name='Innovative_Financial_Dashboard_Project.pdf',
-            mimetype='application/pdf'
+            render=_render_pdf_job
         )
     
+    except QueueFullError as e:
+        return _queue_full_response(e)
+    
     except Exception as e:
         app.logger.error(f"Error generating PDF: {str(e)}")
         return jsonify({
@@ -284,20 +440,17 @@ def generate_pdf():
 def download_portfolio_pdf():
     """Generate and download portfolio PDF"""
     try:
-        # Instantiate the PDF generator
-        pdf_generator = PortfolioPDFGenerator()
-        
-        # Generate a simple PDF with default data
-        pdf_buffer = pdf_generator.generate_simple_pdf()
-        
-        # Send the PDF as a downloadable file
-        return send_file(
-            pdf_buffer,
-            as_attachment=True,
+        # Serve the default portfolio PDF, rendering it only on a cache miss
+        return send_cached_pdf(
+            PortfolioPDFGenerator,
+            DEFAULT_PORTFOLIO_DATA,
             download_name='Innovative_Financial_Dashboard_App.pdf',
-            mimetype='application/pdf'
+            render=_render_pdf_job
         )
     
+    except QueueFullError as e:
+        return _queue_full_response(e)
+    
     except Exception as e:
         app.logger.error(f"Error downloading portfolio PDF: {str(e)}")
         return jsonify({
@@ -305,6 +458,65 @@ def download_portfolio_pdf():
             'message': 'Failed to generate PDF. Please try again.'
         }), 500
 
+# Asynchronous PDF render jobs
+@app.route('/pdf-jobs', methods=['POST'])
+def submit_pdf_job():
+    """
+    Queue a portfolio PDF render and return its job ID
+    
+    CSRF-protected like the forms: send the page's token in an
+    X-CSRFToken header with the JSON body.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        portfolio_data = clean_portfolio_data(data, DEFAULT_PORTFOLIO_DATA)
+    except PortfolioDataError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    try:
+        job_id = pdf_jobs.submit(PortfolioPDFGenerator, portfolio_data)
+    except QueueFullError as e:
+        return _queue_full_response(e)
+    except Exception as e:
+        app.logger.error(f"Error submitting PDF job: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': 'Failed to queue PDF generation. Please try again.'
+        }), 500
+    
+    return jsonify({
+        'status': 'success',
+        'job_id': job_id,
+        'status_url': url_for('pdf_job_status', job_id=job_id),
+        'download_url': url_for('download_pdf_job', job_id=job_id)
+    }), 202
+
+@app.route('/pdf-jobs/<job_id>')
+def pdf_job_status(job_id):
+    """Report the state of a PDF render job"""
+    job = pdf_jobs.status(job_id) if pdf_jobs.is_valid_job_id(job_id) else None
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown PDF job'}), 404
+    
+    return jsonify({'status': 'success', 'job': job})
+
+@app.route('/pdf-jobs/<job_id>/download')
+def download_pdf_job(job_id):
+    """Download the PDF produced by a finished render job"""
+    job = pdf_jobs.status(job_id) if pdf_jobs.is_valid_job_id(job_id) else None
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown PDF job'}), 404
+    if job['state'] != 'done':
+        return jsonify({'status': 'error', 'message': 'PDF is not ready yet', 'job': job}), 409
+    
+    return send_file(
+        pdf_jobs.result_path(job_id),
+        as_attachment=True,
+        download_name='BizzPulse_Portfolio.pdf',
+        mimetype='application/pdf',
+        conditional=True
+    )
+
 # Error handlers
 @app.errorhandler(404)
 def not_found_error(error):
@@ -0,0 +1,170 @@
+"""
+Incrementally maintained admin statistics
+
+Running totals live in stat_counters and per-day counts in daily_stats.
+The write paths add their deltas in the same transaction as the rows
+they change, with atomic upserts, so reading the stats costs one query
+for the counters and one per range of days, however many contacts and
+subscribers there are. rebuild() recomputes both tables from the source
+rows to reconcile them.
+"""
+from datetime import datetime, date, timedelta
+from sqlalchemy import delete, func, text
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from models import Contact, Newsletter, StatCounter, DailyStat
+
+CONTACTS_TOTAL = 'contacts_total'
+CONTACTS_UNREAD = 'contacts_unread'
+CONTACTS_ARCHIVED = 'contacts_archived'
+SUBSCRIBERS_TOTAL = 'subscribers_total'
+SUBSCRIBERS_ACTIVE = 'subscribers_active'
+COUNTERS = (CONTACTS_TOTAL, CONTACTS_UNREAD, CONTACTS_ARCHIVED, SUBSCRIBERS_TOTAL, SUBSCRIBERS_ACTIVE)
+
+# Daily metrics: contact submissions and new newsletter subscriptions
+DAILY_CONTACTS = 'contacts'
+DAILY_SIGNUPS = 'signups'
+DAILY_METRICS = (DAILY_CONTACTS, DAILY_SIGNUPS)
+
+MAX_DAYS = 366
+
+# Dialects with INSERT ... ON CONFLICT ... RETURNING (SQLite needs 3.35+)
+_UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def upsert_insert():
+    """The dialect's INSERT construct with on_conflict_do_update(), or None"""
+    dialect = db.engine.dialect
+    insert = _UPSERT_INSERTS.get(dialect.name)
+    if insert is None or (dialect.name == 'sqlite' and dialect.dbapi.sqlite_version_info < (3, 35)):
+        return None
+    return insert
+
+
+def _add(model, key_columns, value_column, rows):
+    """Add each row's value to the stored one, creating missing rows"""
+    # A fixed order, so concurrent transactions lock the rows in the same order
+    rows = sorted((row for row in rows if row[value_column.key]), key=lambda row: [row[c.key] for c in key_columns])
+    if not rows:
+        return
+    insert = upsert_insert()
+    if insert is not None:
+        statement = insert(model).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={value_column.key: value_column + statement.excluded[value_column.key]}
+        )
+        db.session.execute(statement)
+        return
+    for row in rows:
+        updated = model.query.filter(*[column == row[column.key] for column in key_columns]) \
+            .update({value_column: value_column + row[value_column.key]}, synchronize_session=False)
+        if not updated:
+            db.session.add(model(**row))
+            db.session.flush()
+
+
+def bump(counters=None, daily=None, day=None):
+    """
+    Add deltas to the counters and to `day`'s rollups (today, UTC)
+
+    Runs in the current session; the caller commits together with the
+    rows the deltas describe.
+    """
+    if counters:
+        _add(StatCounter, [StatCounter.name], StatCounter.value,
+             [{'name': name, 'value': delta} for name, delta in counters.items()])
+    if daily:
+        day = day or datetime.utcnow().date()
+        _add(DailyStat, [DailyStat.day, DailyStat.metric], DailyStat.count,
+             [{'day': day, 'metric': metric, 'count': delta} for metric, delta in daily.items()])
+
+
+def record_contact(day=None):
+    bump({CONTACTS_TOTAL: 1, CONTACTS_UNREAD: 1}, {DAILY_CONTACTS: 1}, day)
+
+
+def record_subscribers(inserted=0, reactivated=0, day=None):
+    """Deltas for new subscribers (counted on `day`) and reactivated ones"""
+    bump({SUBSCRIBERS_TOTAL: inserted, SUBSCRIBERS_ACTIVE: inserted + reactivated}, {DAILY_SIGNUPS: inserted}, day)
+
+
+def record_triage(action, updated):
+    """Counter deltas for a bulk triage action that changed `updated` contacts"""
+    deltas = {
+        'read': {CONTACTS_UNREAD: -updated},
+        'unread': {CONTACTS_UNREAD: updated},
+        'archive': {CONTACTS_ARCHIVED: updated},
+        'unarchive': {CONTACTS_ARCHIVED: -updated},
+    }
+    bump(deltas[action])
+
+
+def _as_date(value):
+    # SQLite's date() returns text
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def rebuild(conn):
+    """
+    Recompute both tables from the contacts and subscriptions on `conn`
+
+    Run inside a transaction. On PostgreSQL the stats tables are locked
+    first, so writes that commit meanwhile wait and then add their deltas
+    on top; on SQLite the DELETEs take the write lock, which does the same.
+    Returns the counters.
+    """
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text("LOCK TABLE stat_counters, daily_stats IN EXCLUSIVE MODE"))
+    conn.execute(delete(StatCounter))
+    conn.execute(delete(DailyStat))
+
+    contacts = conn.execute(db.select(
+        func.count(),
+        func.coalesce(func.sum(db.case((Contact.is_read.is_(False), 1), else_=0)), 0),
+        func.coalesce(func.sum(db.case((Contact.is_archived.is_(True), 1), else_=0)), 0)
+    )).one()
+    subscribers = conn.execute(db.select(
+        func.count(),
+        func.coalesce(func.sum(db.case((Newsletter.is_active.is_(True), 1), else_=0)), 0)
+    )).one()
+    counters = {
+        CONTACTS_TOTAL: contacts[0], CONTACTS_UNREAD: contacts[1], CONTACTS_ARCHIVED: contacts[2],
+        SUBSCRIBERS_TOTAL: subscribers[0], SUBSCRIBERS_ACTIVE: subscribers[1],
+    }
+    conn.execute(db.insert(StatCounter), [{'name': name, 'value': value} for name, value in counters.items()])
+
+    rollups = []
+    for metric, column in ((DAILY_CONTACTS, Contact.created_at), (DAILY_SIGNUPS, Newsletter.subscribed_at)):
+        day = func.date(column)
+        for value, count in conn.execute(db.select(day, func.count()).group_by(day)):
+            rollups.append({'day': _as_date(value), 'metric': metric, 'count': count})
+    if rollups:
+        conn.execute(db.insert(DailyStat), rollups)
+    return counters
+
+
+def rebuild_stats():
+    """Run rebuild() in its own transaction; returns the counters (before, after)"""
+    with db.engine.begin() as conn:
+        before = dict.fromkeys(COUNTERS, 0)
+        before.update(conn.execute(db.select(StatCounter.name, StatCounter.value)).all())
+        return before, rebuild(conn)
+
+
+def get_stats(days=30, today=None):
+    """The counters and the last `days` days of rollups, oldest first"""
+    today = today or datetime.utcnow().date()
+    start = today - timedelta(days=days - 1)
+    counters = dict.fromkeys(COUNTERS, 0)
+    counters.update(db.session.query(StatCounter.name, StatCounter.value))
+
+    by_day = {}
+    for day, metric, count in db.session.query(DailyStat.day, DailyStat.metric, DailyStat.count) \
+            .filter(DailyStat.day >= start, DailyStat.day <= today):
+        by_day.setdefault(day, {})[metric] = count
+    daily = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        daily.append({'day': day.isoformat(), **{metric: by_day.get(day, {}).get(metric, 0) for metric in DAILY_METRICS}})
+    return {'counters': counters, 'daily': daily}
@@ -0,0 +1,181 @@
+import os
+import re
+import csv
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from app import db
+from models import Newsletter
+from sqlite_backend import retry_locked
+from stats import upsert_insert, record_subscribers
+
+NEW = 'new'
+ACTIVE = 'already_active'
+REACTIVATED = 'reactivated'
+
+IMPORT_CHUNK_SIZE = int(os.environ.get('NEWSLETTER_IMPORT_CHUNK_SIZE', 1000))
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+EMAIL_MAX_LENGTH = Newsletter.email.type.length
+
+@retry_locked(db.session)
+def subscribe(email):
+    """
+    Subscribe `email`, reactivating it if it had unsubscribed
+
+    One INSERT ... ON CONFLICT (email) DO UPDATE ... WHERE NOT is_active
+    RETURNING subscribed_at tells the three outcomes apart: a new row
+    returns the timestamp just inserted, a reactivated row returns its
+    original one, and an active row is left alone and returns nothing.
+    Other databases fall back to a SELECT then INSERT or UPDATE. Commits
+    and returns NEW, ACTIVE or REACTIVATED.
+    """
+    now = datetime.utcnow()
+    insert = upsert_insert()
+    if insert is None:
+        return _subscribe_fallback(email, now)
+
+    statement = insert(Newsletter).values(email=email, subscribed_at=now, is_active=True)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Newsletter.email],
+        set_={'is_active': True},
+        where=Newsletter.is_active.is_(False)
+    ).returning(Newsletter.subscribed_at)
+    subscribed_at = db.session.execute(statement).scalar()
+    if subscribed_at is None:
+        outcome = ACTIVE
+    else:
+        outcome = NEW if subscribed_at == now else REACTIVATED
+        record_subscribers(inserted=int(outcome == NEW), reactivated=int(outcome == REACTIVATED), day=now.date())
+    db.session.commit()
+    return outcome
+
+
+def _subscribe_fallback(email, now):
+    existing = Newsletter.query.filter_by(email=email).first()
+    if existing:
+        if existing.is_active:
+            return ACTIVE
+        existing.is_active = True
+        record_subscribers(reactivated=1)
+        db.session.commit()
+        return REACTIVATED
+
+    db.session.add(Newsletter(email=email, subscribed_at=now))
+    record_subscribers(inserted=1, day=now.date())
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Someone subscribed the same address in between
+        db.session.rollback()
+        return ACTIVE
+    return NEW
+
+
+def normalize_email(value):
+    """The address as subscribe_newsletter stores it, or None if it is not one"""
+    email = (value or '').strip().lower()
+    if len(email) > EMAIL_MAX_LENGTH or not EMAIL_RE.match(email):
+        return None
+    return email
+
+
+def iter_csv_emails(lines):
+    """
+    Raw email values from CSV `lines` (a text file or any iterable of lines)
+
+    Reads the column headed "email" (any case). Without such a header the
+    first column is used, and the first row counts as data.
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    names = [name.strip().lower() for name in header]
+    if 'email' in names:
+        column = names.index('email')
+    else:
+        column = 0
+        yield header[0] if header else ''
+    for row in reader:
+        yield row[column] if len(row) > column else ''
+
+
+@retry_locked(db.session)
+def _import_chunk(emails, now):
+    """Upsert a chunk of distinct addresses; returns (inserted, reactivated)"""
+    insert = upsert_insert()
+    if insert is None:
+        return _import_chunk_fallback(emails, now)
+
+    # A Core statement executed with a parameter list goes through
+    # SQLAlchemy's "insertmanyvalues" path: one cached single-row statement
+    # expanded to a multi-row VALUES per page, rather than compiling a
+    # new thousand-row statement for every chunk
+    table = Newsletter.__table__
+    statement = insert(table).on_conflict_do_update(
+        index_elements=[table.c.email],
+        set_={'is_active': True},
+        where=table.c.is_active.is_(False)
+    ).returning(table.c.subscribed_at)
+    returned = db.session.execute(statement, [
+        {'email': email, 'subscribed_at': now, 'is_active': True} for email in emails
+    ]).scalars().all()
+    inserted = sum(1 for subscribed_at in returned if subscribed_at == now)
+    record_subscribers(inserted, len(returned) - inserted, day=now.date())
+    db.session.commit()
+    return inserted, len(returned) - inserted
+
+
+def _import_chunk_fallback(emails, now):
+    existing = dict(db.session.query(Newsletter.email, Newsletter.is_active).filter(Newsletter.email.in_(emails)))
+    inactive = [email for email, is_active in existing.items() if not is_active]
+    new = [email for email in emails if email not in existing]
+    if inactive:
+        Newsletter.query.filter(Newsletter.email.in_(inactive)).update({'is_active': True}, synchronize_session=False)
+    if new:
+        db.session.execute(db.insert(Newsletter), [
+            {'email': email, 'subscribed_at': now, 'is_active': True} for email in new
+        ])
+    record_subscribers(len(new), len(inactive), day=now.date())
+    db.session.commit()
+    return len(new), len(inactive)
+
+
+def import_subscribers(values, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Bulk-subscribe the addresses in `values`, one multi-row upsert per chunk
+
+    Addresses are normalized like the signup form and deduplicated within
+    each chunk; an address repeated in a later chunk is simply already
+    active by then. Each chunk is committed on its own, so an interrupted
+    import can be rerun. `progress`, if given, is called with the running
+    counts after every chunk.
+
+    Returns counts of rows read, inserted, reactivated, skipped (already
+    active or duplicate) and invalid.
+    """
+    counts = {'rows': 0, 'inserted': 0, 'reactivated': 0, 'skipped': 0, 'invalid': 0}
+    chunk = {}
+
+    def flush():
+        inserted, reactivated = _import_chunk(list(chunk), datetime.utcnow())
+        counts['inserted'] += inserted
+        counts['reactivated'] += reactivated
+        counts['skipped'] += len(chunk) - inserted - reactivated
+        chunk.clear()
+        if progress:
+            progress(counts)
+
+    for value in values:
+        counts['rows'] += 1
+        email = normalize_email(value)
+        if email is None:
+            counts['invalid'] += 1
+        elif email in chunk:
+            counts['skipped'] += 1
+        else:
+            chunk[email] = True
+            if len(chunk) >= chunk_size:
+                flush()
+    if chunk:
+        flush()
+    return counts
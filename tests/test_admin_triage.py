@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# app.py reads DATABASE_URL at import time
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='triage_test_'), 'test.db')}"
+
+import pytest  # noqa: E402
+from app import app, db  # noqa: E402
+from models import Contact, StatCounter  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def client():
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        for contact_id in (1, 2):
+            db.session.add(Contact(id=contact_id, name=f"Contact {contact_id}",
+                                   email=f"c{contact_id}@example.com", message='Hello'))
+        db.session.commit()
+        yield app.test_client()
+        db.session.rollback()
+        for model in (Contact, StatCounter):
+            model.query.delete()
+        db.session.commit()
+
+
+@pytest.mark.parametrize('body', [
+    {'filter': {}},
+    {'filter': {'email_prefix': ''}},
+    {'filter': {'since': ''}},
+    {'filter': {'is_read': '  '}},
+    {'filter': {'until': None}},
+    {'filter': {'email_prefix': ['c1']}},
+    {'filter': {'email_prefix': 'c1', 'since': ''}},
+    {'filter': {'name': 'Contact 1'}},
+])
+def test_filter_without_a_real_condition_is_refused(client, body):
+    response = client.post('/admin/contacts/bulk/archive', json=body)
+    assert response.status_code == 400
+    assert not Contact.query.filter_by(is_archived=True).count()
+
+
+def test_filter_archives_only_matching_contacts(client):
+    response = client.post('/admin/contacts/bulk/archive', json={'filter': {'email_prefix': 'c1'}})
+    assert response.status_code == 200
+    assert response.get_json()['updated'] == 1
+    assert [c.id for c in Contact.query.filter_by(is_archived=True)] == [1]
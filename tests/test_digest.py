@@ -0,0 +1,107 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# app.py reads DATABASE_URL at import time
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='digest_test_'), 'test.db')}"
+
+import pytest  # noqa: E402
+from app import app, db  # noqa: E402
+from models import Contact, AdminDigest, EmailOutbox  # noqa: E402
+from digest import build_digest, TIME_FORMAT  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def context():
+    with app.app_context():
+        yield
+        db.session.rollback()
+        for model in (EmailOutbox, Contact, AdminDigest):
+            model.query.delete()
+        db.session.commit()
+
+
+def add_contact(contact_id, created_at, **fields):
+    db.session.add(Contact(id=contact_id, name=f"Contact {contact_id}", email=f"c{contact_id}@example.com",
+                           message='Hello', created_at=created_at, **fields))
+    db.session.commit()
+
+
+def last_digest_email():
+    entry = EmailOutbox.query.filter_by(kind='admin_digest').order_by(EmailOutbox.id.desc()).first()
+    return json.loads(entry.payload)['digest']
+
+
+def test_contact_committed_after_a_digest_with_a_lower_id_is_reported_next():
+    now = datetime.utcnow()
+    add_contact(1, now - timedelta(minutes=3))
+    add_contact(3, now - timedelta(minutes=2))
+
+    first = build_digest('admin@example.com', now=now)
+    assert first.contact_count == 2
+    assert (first.after_contact_id, first.last_contact_id) == (0, 3)
+
+    # Contact 2 got its id before contact 3 but committed after the digest
+    add_contact(2, now - timedelta(minutes=1))
+
+    second = build_digest('admin@example.com', now=now + timedelta(minutes=1))
+    assert second is not None
+    assert second.contact_count == 1
+    assert (second.after_contact_id, second.last_contact_id) == (1, 2)
+    assert [c['email'] for c in last_digest_email()['contacts']] == ['c2@example.com']
+    assert {c.id: c.digest_id for c in Contact.query} == {1: first.id, 2: second.id, 3: first.id}
+
+    assert build_digest('admin@example.com', now=now + timedelta(minutes=2)) is None
+
+
+def test_read_contacts_are_left_out():
+    now = datetime.utcnow()
+    add_contact(1, now - timedelta(minutes=2), is_read=True)
+    add_contact(2, now - timedelta(minutes=1))
+
+    digest = build_digest('admin@example.com', now=now)
+    assert digest.contact_count == 1
+    assert db.session.get(Contact, 1).digest_id is None
+
+
+def test_times_are_shown_in_local_time(monkeypatch):
+    monkeypatch.setenv('TZ', 'Asia/Kolkata')
+    time.tzset()
+    try:
+        now = datetime(2024, 3, 1, 12, 0)
+        add_contact(1, now - timedelta(minutes=30))
+        build_digest('admin@example.com', now=now)
+        email = last_digest_email()
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    assert email['window_end'] == 'March 01, 2024 at 05:30 PM'
+    assert email['window_start'] == email['contacts'][0]['created_at'] == 'March 01, 2024 at 05:00 PM'
+
+
+def test_digest_waits_for_a_concurrent_build():
+    now = datetime.utcnow()
+    add_contact(1, now - timedelta(minutes=1))
+    results = []
+
+    def build():
+        with app.app_context():
+            results.append(build_digest('admin@example.com', now=now))
+
+    # Another worker holds the digest lock and reports the contact meanwhile
+    with db.engine.connect() as other:
+        other.execute(db.update(AdminDigest).where(db.false()).values(id=AdminDigest.id))
+        worker = threading.Thread(target=build)
+        worker.start()
+        time.sleep(0.5)
+        other.execute(db.update(Contact).values(is_read=True))
+        other.commit()
+    worker.join()
+    assert results == [None]
+    assert AdminDigest.query.count() == 0
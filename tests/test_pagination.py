@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# app.py reads DATABASE_URL at import time
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='pagination_test_'), 'test.db')}"
+
+import pytest  # noqa: E402
+from app import app, db  # noqa: E402
+from models import Contact  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        for contact_id, email in enumerate(['jane@example.com', 'a\U0010ffff@example.com', '\ud7ff@example.com'], 1):
+            db.session.add(Contact(id=contact_id, name='Contact', email=email, message='Hello'))
+        db.session.commit()
+        yield app.test_client()
+        db.session.rollback()
+        Contact.query.delete()
+        db.session.commit()
+
+
+@pytest.mark.parametrize('prefix, emails', [
+    ('JA', ['jane@example.com']),
+    ('a\U0010ffff', ['a\U0010ffff@example.com']),
+    ('\U0010ffff', []),
+    ('\ud7ff', ['\ud7ff@example.com']),
+])
+def test_email_prefix(client, prefix, emails):
+    response = client.get('/admin/contacts', query_string={'email_prefix': prefix})
+    assert response.status_code == 200
+    assert [c['email'] for c in response.get_json()['items']] == emails